@@ -4,26 +4,92 @@
 Extracts detailed metadata for enhanced lock screen information
 """
 
+import argparse
 import requests
-from bs4 import BeautifulSoup
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import aiohttp
+import asyncio
+import ahocorasick
+from lxml import html as lxml_html
 import re
 import json
-import time
 from datetime import datetime
 import sqlite3
+from rate_limit import AsyncRateLimiter
+
+# Patterns used by parse_info_text, compiled once at import time
+_DATE_RES = [
+    re.compile(r'(\d{4})'),  # Year
+    re.compile(r'(\w+ \d{4})'),  # Month Year
+    re.compile(r'(\d{1,2}/\d{1,2}/\d{4})'),  # MM/DD/YYYY
+]
+
+_SKATER_RE = re.compile(r'\b([A-Z][a-z]+(?:\s[A-Z][a-z]+){1,2})\b')  # First [Middle] Last
+
+_LOC_RES = [
+    re.compile(r'in ([A-Z][a-z]+(?: [A-Z][a-z]+)*)'),  # "in [Location]"
+    re.compile(r'at ([A-Z][a-z]+(?: [A-Z][a-z]+)*)'),  # "at [Location]"
+]
+
+_MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+TRICK_KEYWORDS = [
+    'kickflip', 'heelflip', 'ollie', '360', '180', 'shove-it', 'pop shove-it',
+    'varial', 'double', 'triple', 'quad', 'backside', 'frontside', 'switch',
+    'nollie', 'fakie', 'nose', 'tail', 'grind', 'slide', 'manual', 'nose manual',
+    'tail manual', '50-50', 'boardslide', 'lipslide', 'crooked', 'smith',
+    'feeble', 'nosegrind', 'tailgrind', 'overcrook', 'salad', 'soup'
+]
+
+OBSTACLE_KEYWORDS = [
+    'rail', 'ledge', 'stairs', 'gap', 'bank', 'quarter pipe', 'half pipe',
+    'ramp', 'bowl', 'pool', 'curb', 'handrail', 'kicker', 'funbox',
+    'pyramid', 'spine', 'wall', 'wallride', 'tree', 'pole', 'bench'
+]
+
+def build_keyword_automaton(keyword_groups):
+    """Build one Aho-Corasick automaton that finds every group's keywords in one pass"""
+    automaton = ahocorasick.Automaton()
+    for group, keywords in keyword_groups.items():
+        for keyword in keywords:
+            automaton.add_word(keyword, (group, keyword))
+    automaton.make_automaton()
+    return automaton
+
+# No keyword appears in both lists, so each word maps to a single group
+KEYWORD_AC = build_keyword_automaton({'tricks': TRICK_KEYWORDS, 'obstacles': OBSTACLE_KEYWORDS})
 
 class FourPlyMagScraper:
-    def __init__(self):
+    def __init__(self, refresh=False):
         self.base_url = "http://4plymag.com/thrashersearch/"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.metadata = []
         
+        # Reuse one keep-alive connection pool for every request to 4plymag,
+        # with responses cached on disk so re-runs don't hit the network
+        self.session = requests_cache.CachedSession(
+            '4plymag_cache', expire_after=86400 * 30, allowable_methods=['GET', 'POST']
+        )
+        if refresh:
+            self.session.cache.clear()
+        self.session.headers.update(self.headers)
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                        allowed_methods=['GET', 'POST'])  # Searches are read-only POSTs
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
     def fetch_page(self, url):
         """Fetch webpage content"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
@@ -38,7 +104,7 @@ class FourPlyMagScraper:
             # POST search request
             data = {'search': search_term}
             try:
-                response = requests.post(self.base_url, data=data, headers=self.headers, timeout=10)
+                response = self.session.post(self.base_url, data=data, timeout=10)
                 response.raise_for_status()
                 return response.text
             except requests.RequestException as e:
@@ -53,38 +119,33 @@ class FourPlyMagScraper:
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = lxml_html.fromstring(html)
         covers = []
         
-        # Look for table rows with cover data
-        rows = soup.find_all('tr')
+        # Look for table rows with cover data (info cell + cover cell)
+        rows = tree.xpath('//tr[td[2]]')
         
         for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 2:
-                info_cell = cells[0]
-                cover_cell = cells[1]
-                
-                # Extract info text
-                info_text = info_cell.get_text(strip=True)
-                
-                # Extract cover image
-                cover_img = cover_cell.find('img')
-                cover_url = None
-                if cover_img and cover_img.get('src'):
-                    cover_url = cover_img.get('src')
-                    if not cover_url.startswith('http'):
-                        cover_url = f"http://4plymag.com{cover_url}"
-                
-                # Parse info text for metadata
-                metadata = self.parse_info_text(info_text)
-                
-                if metadata:
-                    covers.append({
-                        'info_text': info_text,
-                        'cover_url': cover_url,
-                        'metadata': metadata
-                    })
+            # Extract info text
+            info_text = ''.join(text.strip() for text in row.xpath('./td[1]//text()'))
+            
+            # Extract cover image
+            cover_url = None
+            srcs = row.xpath('./td[2]//img/@src')
+            if srcs and srcs[0]:
+                cover_url = srcs[0]
+                if not cover_url.startswith('http'):
+                    cover_url = f"http://4plymag.com{cover_url}"
+            
+            # Parse info text for metadata
+            metadata = self.parse_info_text(info_text)
+            
+            if metadata:
+                covers.append({
+                    'info_text': info_text,
+                    'cover_url': cover_url,
+                    'metadata': metadata
+                })
         
         return covers
     
@@ -93,73 +154,36 @@ class FourPlyMagScraper:
         metadata = {}
         
         # Extract date (various formats)
-        date_patterns = [
-            r'(\d{4})',  # Year
-            r'(\w+ \d{4})',  # Month Year
-            r'(\d{1,2}/\d{1,2}/\d{4})',  # MM/DD/YYYY
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, info_text)
+        for rx in _DATE_RES:
+            match = rx.search(info_text)
             if match:
                 metadata['date'] = match.group(1)
                 break
         
         # Extract skater names (common patterns)
-        skater_patterns = [
-            r'([A-Z][a-z]+ [A-Z][a-z]+)',  # First Last
-            r'([A-Z][a-z]+ [A-Z][a-z]+ [A-Z][a-z]+)',  # First Middle Last
-        ]
-        
-        skaters = []
-        for pattern in skater_patterns:
-            matches = re.findall(pattern, info_text)
-            skaters.extend(matches)
+        skaters = _SKATER_RE.findall(info_text)
         
         if skaters:
-            metadata['skaters'] = list(set(skaters))  # Remove duplicates
+            metadata['skaters'] = list(dict.fromkeys(skaters))  # Remove duplicates, keep order
         
-        # Extract tricks
-        trick_keywords = [
-            'kickflip', 'heelflip', 'ollie', '360', '180', 'shove-it', 'pop shove-it',
-            'varial', 'double', 'triple', 'quad', 'backside', 'frontside', 'switch',
-            'nollie', 'fakie', 'nose', 'tail', 'grind', 'slide', 'manual', 'nose manual',
-            'tail manual', '50-50', 'boardslide', 'lipslide', 'crooked', 'smith',
-            'feeble', 'nosegrind', 'tailgrind', 'overcrook', 'salad', 'soup'
-        ]
+        # Lowercase once and scan for tricks and obstacles in a single pass
+        found_keywords = {match for _, match in KEYWORD_AC.iter(info_text.lower())}
         
-        tricks = []
-        info_lower = info_text.lower()
-        for trick in trick_keywords:
-            if trick in info_lower:
-                tricks.append(trick)
+        # Extract tricks (keyword order is kept for stable output)
+        tricks = [trick for trick in TRICK_KEYWORDS if ('tricks', trick) in found_keywords]
         
         if tricks:
             metadata['tricks'] = tricks
         
         # Extract obstacles/spots
-        obstacle_keywords = [
-            'rail', 'ledge', 'stairs', 'gap', 'bank', 'quarter pipe', 'half pipe',
-            'ramp', 'bowl', 'pool', 'curb', 'handrail', 'kicker', 'funbox',
-            'pyramid', 'spine', 'wall', 'wallride', 'tree', 'pole', 'bench'
-        ]
-        
-        obstacles = []
-        for obstacle in obstacle_keywords:
-            if obstacle in info_lower:
-                obstacles.append(obstacle)
+        obstacles = [obstacle for obstacle in OBSTACLE_KEYWORDS if ('obstacles', obstacle) in found_keywords]
         
         if obstacles:
             metadata['obstacles'] = obstacles
         
         # Extract location (if mentioned)
-        location_patterns = [
-            r'in ([A-Z][a-z]+(?: [A-Z][a-z]+)*)',  # "in [Location]"
-            r'at ([A-Z][a-z]+(?: [A-Z][a-z]+)*)',  # "at [Location]"
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, info_text)
+        for rx in _LOC_RES:
+            match = rx.search(info_text)
             if match:
                 metadata['location'] = match.group(1)
                 break
@@ -184,6 +208,39 @@ class FourPlyMagScraper:
         html = self.search_covers(trick)
         return self.extract_cover_data(html)
     
+    async def _fetch(self, session, url, data=None):
+        """Fetch webpage content asynchronously (POST when data is given)"""
+        method = 'POST' if data else 'GET'
+        try:
+            async with session.request(method, url, data=data) as response:
+                response.raise_for_status()
+                return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+    
+    async def _search_year_async(self, session, semaphore, limiter, year):
+        """Search for covers from a specific year without blocking other years"""
+        async with semaphore:
+            await limiter.wait()
+            print(f"Searching for covers from {year}...")
+            html = await self._fetch(session, self.base_url, data={'search': str(year)})
+        return self.extract_cover_data(html)
+    
+    async def _get_all_covers_async(self, concurrency=4, rate=2):
+        """Fetch every year concurrently with a connection cap and rate limit"""
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = AsyncRateLimiter(rate)  # Be respectful
+        connector = aiohttp.TCPConnector(limit_per_host=concurrency)
+        timeout = aiohttp.ClientTimeout(total=10)
+        
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            years = list(range(1981, 2026))
+            tasks = [self._search_year_async(session, semaphore, limiter, year) for year in years]
+            results = await asyncio.gather(*tasks)
+        
+        return list(zip(years, results))
+    
     def get_all_covers(self):
         """Get all available covers (may take time)"""
         print("Fetching all available covers from 4plymag...")
@@ -191,11 +248,9 @@ class FourPlyMagScraper:
         # Search by years (1981-2025)
         all_covers = []
         
-        for year in range(1981, 2026):
-            year_covers = self.search_by_year(year)
+        for year, year_covers in asyncio.run(self._get_all_covers_async()):
             all_covers.extend(year_covers)
             print(f"Found {len(year_covers)} covers from {year}")
-            time.sleep(1)  # Be respectful
         
         return all_covers
     
@@ -207,6 +262,17 @@ class FourPlyMagScraper:
         with open(thrasher_covers_file, 'r') as f:
             thrasher_covers = json.load(f)
         
+        # Search 4plymag once per distinct year/month, not once per cover
+        needed = {
+            (cover['date'][:4], cover['date'][5:7])
+            for cover in thrasher_covers
+            if isinstance(cover, dict) and 'date' in cover
+        }
+        month_results = {}
+        for year, month in sorted(needed):
+            search_term = f"{year} {self.get_month_name(int(month))}"
+            month_results[(year, month)] = self.extract_cover_data(self.search_covers(search_term))
+        
         enhanced_covers = []
         
         for cover in thrasher_covers:
@@ -218,13 +284,10 @@ class FourPlyMagScraper:
             
             # Try to find matching 4plymag data
             if isinstance(cover, dict) and 'date' in cover:
-                # Search 4plymag for this date
+                # Look up the 4plymag results for this date
                 year = cover['date'][:4]
                 month = cover['date'][5:7]
-                
-                # Search by year and month
-                search_term = f"{year} {self.get_month_name(int(month))}"
-                matching_covers = self.search_covers(search_term)
+                matching_covers = month_results[(year, month)]
                 
                 if matching_covers:
                     # Find best match
@@ -238,11 +301,7 @@ class FourPlyMagScraper:
     
     def get_month_name(self, month_num):
         """Convert month number to name"""
-        months = [
-            'January', 'February', 'March', 'April', 'May', 'June',
-            'July', 'August', 'September', 'October', 'November', 'December'
-        ]
-        return months[month_num - 1] if 1 <= month_num <= 12 else ''
+        return _MONTHS[month_num - 1] if 1 <= month_num <= 12 else ''
     
     def find_best_match(self, thrasher_cover, fourply_covers):
         """Find the best matching cover from 4plymag data"""
@@ -265,7 +324,11 @@ class FourPlyMagScraper:
         print(f"Saved metadata to {filename}")
 
 def main():
-    scraper = FourPlyMagScraper()
+    parser = argparse.ArgumentParser(description="Scrape Thrasher cover metadata from 4plymag")
+    parser.add_argument('--refresh', action='store_true', help="Clear cached responses and fetch fresh pages")
+    args = parser.parse_args()
+    
+    scraper = FourPlyMagScraper(refresh=args.refresh)
     
     # Test with a few searches
     print("Testing 4plymag scraper...")
@@ -6,9 +6,155 @@ Includes configuration file for easy editing later
 """
 
 import csv
+import hashlib
 import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
 import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from tqdm import tqdm
+
+@lru_cache(maxsize=None)
+def _get_font(family, weight, size):
+    """Load a font once per process and reuse it for every image"""
+    try:
+        return ImageFont.truetype(f"{family}-{weight}.ttf", size)
+    except OSError:
+        # Fallback font
+        return ImageFont.load_default()
+
+_MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+_MONTH_TO_NUM = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'winter': 12  # Winter issue typically December
+}
+
+def get_month_name(month_num):
+    """Convert month number to name"""
+    return _MONTHS[month_num - 1] if 1 <= month_num <= 12 else ''
+
+def create_text_overlay(image_path, metadata, config, output_dir):
+    """Create text overlay on image using configuration
+    
+    Module-level so it can be dispatched to worker processes.
+    """
+    try:
+        # Open image and draw on it directly (the input file is never overwritten)
+        overlay_image = Image.open(image_path)
+        overlay_image.load()
+        draw = ImageDraw.Draw(overlay_image)
+        
+        # Load fonts based on configuration
+        font_config = config["font_settings"]
+        font_large = _get_font(font_config['font_family'], "Bold", font_config["large_size"])
+        font_medium = _get_font(font_config['font_family'], "Regular", font_config["medium_size"])
+        font_small = _get_font(font_config['font_family'], "Regular", font_config["small_size"])
+        
+        # Get colors from config
+        text_color = tuple(config["colors"]["text_color"])
+        outline_color = tuple(config["colors"]["outline_color"])
+        outline_width = config["colors"]["outline_width"]
+        
+        # Get positioning from config
+        pos_config = config["positioning"]
+        text_x = pos_config["text_x"]
+        text_y_start = pos_config["text_y_start"]
+        line_spacing = pos_config["line_spacing"]
+        
+        # Build text content based on config
+        lines = []
+        content_config = config["content"]
+        
+        # Date line
+        if content_config["show_date"] and metadata.get('year') and metadata.get('month'):
+            month_name = get_month_name(int(metadata['month']))
+            date_text = f"{month_name} {metadata['year']}"
+            lines.append(("date", date_text))
+        
+        # Skater line
+        if content_config["show_skater"] and metadata.get('skater') and metadata['skater'].strip():
+            skater_text = metadata['skater'].strip()
+            lines.append(("skater", skater_text))
+        
+        # Trick line
+        if content_config["show_trick"] and metadata.get('trick') and metadata['trick'].strip():
+            trick_text = metadata['trick'].strip()
+            lines.append(("trick", trick_text))
+        
+        # Obstacle line (if enabled)
+        if content_config["show_obstacle"] and metadata.get('obstacle') and metadata['obstacle'].strip():
+            obstacle_text = metadata['obstacle'].strip()
+            lines.append(("obstacle", obstacle_text))
+        
+        # Location line
+        if content_config["show_location"] and metadata.get('location') and metadata['location'].strip():
+            location_text = metadata['location'].strip()
+            lines.append(("location", location_text))
+        
+        # Render every line into a single mask so the outline can be built
+        # with one dilation instead of redrawing the text at every offset
+        text_mask = Image.new('L', overlay_image.size, 0)
+        mask_draw = ImageDraw.Draw(text_mask)
+        placed_lines = []
+        
+        # Draw text lines
+        for i, (line_type, line) in enumerate(lines):
+            # Choose font based on line type
+            if line_type in ["date", "skater"]:
+                font = font_large
+            else:
+                font = font_medium
+            
+            # Calculate text position
+            text_y = text_y_start + (i * line_spacing)
+            
+            # Get text size for centering (advance width + cached font metrics)
+            text_width = int(font.getlength(line))
+            ascent, descent = font.getmetrics()
+            text_height = ascent + descent
+            
+            # Center the text
+            x = text_x - (text_width // 2)
+            y = text_y - (text_height // 2)
+            
+            mask_draw.text((x, y), line, font=font, fill=255)
+            placed_lines.append(((x, y), line, font))
+        
+        # Draw outline: dilate the text mask with a square kernel, which matches
+        # offsetting the text by every (dx, dy) within outline_width
+        mask_bbox = text_mask.getbbox()
+        if mask_bbox:
+            region = (
+                max(mask_bbox[0] - outline_width, 0),
+                max(mask_bbox[1] - outline_width, 0),
+                min(mask_bbox[2] + outline_width, overlay_image.width),
+                min(mask_bbox[3] + outline_width, overlay_image.height)
+            )
+            outline_mask = text_mask.crop(region).filter(ImageFilter.MaxFilter(2 * outline_width + 1))
+            overlay_image.paste(outline_color, region, outline_mask)
+        
+        # Draw main text
+        for (x, y), line, font in placed_lines:
+            draw.text((x, y), line, font=font, fill=text_color)
+        
+        # Save the image
+        filename = os.path.basename(image_path)
+        output_path = os.path.join(output_dir, filename)
+        # Single-pass JPEG encode (no Huffman optimisation pass), 4:2:2 chroma
+        overlay_image.save(output_path, quality=95, subsampling=1, optimize=False, progressive=False)
+        
+        return output_path
+    
+    except Exception as e:
+        print(f"Error processing {image_path}: {e}")
+        return None
 
 class TextOverlayApplier:
     def __init__(self):
@@ -74,137 +220,32 @@ class TextOverlayApplier:
         fourply_data = {}
         
         with open(self.csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            header = next(reader)
+            year_idx, month_idx = header.index('year'), header.index('month')
             for row in reader:
                 # Create key in YYYY_MM format
-                year = row['year']
-                month = self.month_to_number(row['month'])
+                year = row[year_idx]
+                month = self.month_to_number(row[month_idx])
                 if month:
                     key = f"{year}_{month:02d}"
-                    fourply_data[key] = row
+                    # Only build a dict for rows that are actually kept
+                    fourply_data[key] = dict(zip(header, row))
         
         print(f"Loaded {len(fourply_data)} entries from 4ply CSV")
         return fourply_data
     
     def month_to_number(self, month_name):
         """Convert month name to number"""
-        months = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12,
-            'winter': 12  # Winter issue typically December
-        }
-        return months.get(month_name.lower())
+        return _MONTH_TO_NUM.get(month_name.lower())
     
     def create_text_overlay(self, image_path, metadata):
         """Create text overlay on image using configuration"""
-        try:
-            # Open image
-            image = Image.open(image_path)
-            
-            # Create a copy for drawing
-            overlay_image = image.copy()
-            draw = ImageDraw.Draw(overlay_image)
-            
-            # Load fonts based on configuration
-            font_config = self.config["font_settings"]
-            try:
-                font_large = ImageFont.truetype(f"{font_config['font_family']}-Bold.ttf", font_config["large_size"])
-                font_medium = ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["medium_size"])
-                font_small = ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["small_size"])
-            except:
-                # Fallback fonts
-                font_large = ImageFont.load_default()
-                font_medium = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            
-            # Get colors from config
-            text_color = tuple(self.config["colors"]["text_color"])
-            outline_color = tuple(self.config["colors"]["outline_color"])
-            outline_width = self.config["colors"]["outline_width"]
-            
-            # Get positioning from config
-            pos_config = self.config["positioning"]
-            text_x = pos_config["text_x"]
-            text_y_start = pos_config["text_y_start"]
-            line_spacing = pos_config["line_spacing"]
-            
-            # Build text content based on config
-            lines = []
-            content_config = self.config["content"]
-            
-            # Date line
-            if content_config["show_date"] and metadata.get('year') and metadata.get('month'):
-                month_name = self.get_month_name(int(metadata['month']))
-                date_text = f"{month_name} {metadata['year']}"
-                lines.append(("date", date_text))
-            
-            # Skater line
-            if content_config["show_skater"] and metadata.get('skater') and metadata['skater'].strip():
-                skater_text = metadata['skater'].strip()
-                lines.append(("skater", skater_text))
-            
-            # Trick line
-            if content_config["show_trick"] and metadata.get('trick') and metadata['trick'].strip():
-                trick_text = metadata['trick'].strip()
-                lines.append(("trick", trick_text))
-            
-            # Obstacle line (if enabled)
-            if content_config["show_obstacle"] and metadata.get('obstacle') and metadata['obstacle'].strip():
-                obstacle_text = metadata['obstacle'].strip()
-                lines.append(("obstacle", obstacle_text))
-            
-            # Location line
-            if content_config["show_location"] and metadata.get('location') and metadata['location'].strip():
-                location_text = metadata['location'].strip()
-                lines.append(("location", location_text))
-            
-            # Draw text lines
-            for i, (line_type, line) in enumerate(lines):
-                # Choose font based on line type
-                if line_type in ["date", "skater"]:
-                    font = font_large
-                else:
-                    font = font_medium
-                
-                # Calculate text position
-                text_y = text_y_start + (i * line_spacing)
-                
-                # Get text bounds for centering
-                bbox = draw.textbbox((0, 0), line, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                
-                # Center the text
-                x = text_x - (text_width // 2)
-                y = text_y - (text_height // 2)
-                
-                # Draw outline
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        draw.text((x + dx, y + dy), line, font=font, fill=outline_color)
-                
-                # Draw main text
-                draw.text((x, y), line, font=font, fill=text_color)
-            
-            # Save the image
-            filename = os.path.basename(image_path)
-            output_path = os.path.join(self.output_dir, filename)
-            overlay_image.save(output_path, quality=95)
-            
-            return output_path
-            
-        except Exception as e:
-            print(f"Error processing {image_path}: {e}")
-            return None
+        return create_text_overlay(image_path, metadata, self.config, self.output_dir)
     
     def get_month_name(self, month_num):
         """Convert month number to name"""
-        months = [
-            'January', 'February', 'March', 'April', 'May', 'June',
-            'July', 'August', 'September', 'October', 'November', 'December'
-        ]
-        return months[month_num - 1] if 1 <= month_num <= 12 else ''
+        return get_month_name(month_num)
     
     def process_all_images(self):
         """Process all images to add text overlays"""
@@ -222,42 +263,72 @@ class TextOverlayApplier:
         
         print(f"Found {len(image_files)} images to process")
         
+        # Build the work list up front so the images can be processed in parallel
+        tasks = []
+        for filename in image_files:
+            # Extract date from filename (YYYY_MM[_...].ext)
+            parts = filename.rsplit('.', 1)[0].split('_', 2)
+            if len(parts) >= 2:
+                year, month = parts[0], parts[1]
+                
+                # Look up metadata in 4ply data and add date info from filename
+                metadata = {**self.fourply_data.get(f"{year}_{month}", {}), 'year': year, 'month': month}
+                tasks.append((filename, os.path.join(self.input_dir, filename), metadata))
+        
         processed_count = 0
         failed_count = 0
         processed_files = []
         
-        for i, filename in enumerate(image_files):
-            print(f"Processing {i+1}/{len(image_files)}: {filename}")
-            
-            image_path = os.path.join(self.input_dir, filename)
+        # Skip images whose output is newer than the input, config and CSV.
+        # The config hash catches edits that didn't change the file's mtime.
+        config_hash = hashlib.sha256(json.dumps(self.config, sort_keys=True).encode()).hexdigest()
+        hash_file = os.path.join(self.output_dir, '.config_hash')
+        config_unchanged = False
+        if os.path.exists(hash_file):
+            with open(hash_file, 'r') as f:
+                config_unchanged = f.read().strip() == config_hash
+        deps_mtime = max(os.path.getmtime(self.config_file), os.path.getmtime(self.csv_file))
+        
+        pending_tasks = []
+        for filename, image_path, metadata in tasks:
+            output_path = os.path.join(self.output_dir, filename)
+            if (config_unchanged and os.path.exists(output_path)
+                    and os.path.getmtime(output_path) > max(os.path.getmtime(image_path), deps_mtime)):
+                processed_count += 1
+                processed_files.append({
+                    'input': filename,
+                    'output': filename,
+                    'metadata': metadata
+                })
+            else:
+                pending_tasks.append((filename, image_path, metadata))
+        
+        print(f"Skipping {len(tasks) - len(pending_tasks)} up-to-date images")
+        
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(
+                create_text_overlay,
+                [image_path for _, image_path, _ in pending_tasks],
+                [metadata for _, _, metadata in pending_tasks],
+                repeat(self.config),
+                repeat(self.output_dir),
+                chunksize=8
+            )
             
-            # Extract date from filename
-            name_without_ext = os.path.splitext(filename)[0]
-            if '_' in name_without_ext:
-                parts = name_without_ext.split('_')
-                if len(parts) >= 2:
-                    year = parts[0]
-                    month = parts[1]
-                    
-                    # Look up metadata in 4ply data
-                    key = f"{year}_{month}"
-                    metadata = self.fourply_data.get(key, {})
-                    
-                    # Add date info from filename
-                    metadata['year'] = year
-                    metadata['month'] = month
-                    
-                    # Create text overlay
-                    output_path = self.create_text_overlay(image_path, metadata)
-                    if output_path:
-                        processed_count += 1
-                        processed_files.append({
-                            'input': filename,
-                            'output': os.path.basename(output_path),
-                            'metadata': metadata
-                        })
-                    else:
-                        failed_count += 1
+            progress = tqdm(zip(pending_tasks, results), total=len(pending_tasks), desc="Applying overlays", unit="image")
+            for (filename, _, metadata), output_path in progress:
+                if output_path:
+                    processed_count += 1
+                    processed_files.append({
+                        'input': filename,
+                        'output': os.path.basename(output_path),
+                        'metadata': metadata
+                    })
+                else:
+                    failed_count += 1
+        
+        with open(hash_file, 'w') as f:
+            f.write(config_hash)
         
         # Save processing info
         processing_info = {
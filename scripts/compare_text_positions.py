@@ -6,9 +6,16 @@ Creates side-by-side comparisons of old vs new text positioning
 
 import csv
 import os
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageDraw, ImageFont
 import json
 
+_MONTH_TO_NUM = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'winter': 12
+}
+
 class TextPositionComparer:
     def __init__(self):
         self.input_dir = "images/optimized_final_fixed"
@@ -29,6 +36,13 @@ class TextPositionComparer:
         # Load 4ply data
         self.fourply_data = self.load_4ply_data()
         
+        # Load fonts once for every comparison
+        self.font_large, self.font_medium = self.load_overlay_fonts()
+        try:
+            self.label_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 48)
+        except:
+            self.label_font = ImageFont.load_default()
+        
         # Old positioning (what you had before)
         self.old_text_y = 2210
         
@@ -59,13 +73,14 @@ class TextPositionComparer:
         
         if os.path.exists(self.csv_file):
             with open(self.csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
+                reader = csv.reader(f)
+                header = next(reader)
+                year_idx, month_idx = header.index('year'), header.index('month')
                 for row in reader:
-                    year = row['year']
-                    month = self.month_to_number(row['month'])
+                    month = _MONTH_TO_NUM.get(row[month_idx].lower())
                     if month:
-                        key = f"{year}_{month:02d}"
-                        fourply_data[key] = row
+                        key = f"{row[year_idx]}_{month:02d}"
+                        fourply_data[key] = dict(zip(header, row))
             
             print(f"Loaded {len(fourply_data)} entries from 4ply CSV")
         else:
@@ -73,31 +88,34 @@ class TextPositionComparer:
         
         return fourply_data
     
+    def load_overlay_fonts(self):
+        """Load the large and medium overlay fonts from the configuration"""
+        try:
+            font_config = self.config["font_settings"]
+            font_large = ImageFont.truetype(f"{font_config['font_family']}-Bold.ttf", font_config["large_size"])
+            font_medium = ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["medium_size"])
+        except:
+            font_large = ImageFont.load_default()
+            font_medium = ImageFont.load_default()
+        return font_large, font_medium
+    
     def month_to_number(self, month_name):
         """Convert month name to number"""
-        months = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12,
-            'winter': 12
-        }
-        return months.get(month_name.lower())
+        return _MONTH_TO_NUM.get(month_name.lower())
     
     def create_old_position_overlay(self, image_path, metadata):
-        """Create text overlay with old positioning"""
+        """Create text overlay with old positioning
+        
+        Returns the saved path and the in-memory image so the comparison
+        doesn't have to decode it again.
+        """
         try:
             image = Image.open(image_path)
             overlay_image = image.copy()
             draw = ImageDraw.Draw(overlay_image)
             
-            # Load fonts
-            font_config = self.config["font_settings"]
-            try:
-                font_large = ImageFont.truetype(f"{font_config['font_family']}-Bold.ttf", font_config["large_size"])
-                font_medium = ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["medium_size"])
-            except:
-                font_large = ImageFont.load_default()
-                font_medium = ImageFont.load_default()
+            font_large = self.font_large
+            font_medium = self.font_medium
             
             # Get colors and positioning
             text_color = tuple(self.config["colors"]["text_color"])
@@ -145,10 +163,8 @@ class TextPositionComparer:
                 y = current_y - (text_height // 2)
                 
                 # Draw outline and text
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        draw.text((x + dx, y + dy), line, font=font, fill=outline_color)
-                draw.text((x, y), line, font=font, fill=text_color)
+                draw.text((x, y), line, font=font, fill=text_color,
+                          stroke_width=outline_width, stroke_fill=outline_color)
                 
                 current_y += text_height + line_spacing
             
@@ -157,11 +173,11 @@ class TextPositionComparer:
             output_path = os.path.join(self.old_output_dir, filename)
             overlay_image.save(output_path, quality=95)
             
-            return output_path
+            return output_path, overlay_image
             
         except Exception as e:
             print(f"Error creating old position overlay: {e}")
-            return None
+            return None, None
     
     def get_month_name(self, month_num):
         """Convert month number to name"""
@@ -171,11 +187,10 @@ class TextPositionComparer:
         ]
         return months[month_num - 1] if 1 <= month_num <= 12 else ''
     
-    def create_comparison_image(self, old_path, new_path, filename):
+    def create_comparison_image(self, old_img, new_path, filename):
         """Create side-by-side comparison image"""
         try:
-            # Open both images
-            old_img = Image.open(old_path)
+            # Only the new version needs to be read from disk
             new_img = Image.open(new_path)
             
             # Ensure both images are the same size
@@ -192,10 +207,7 @@ class TextPositionComparer:
             
             # Add labels
             draw = ImageDraw.Draw(comparison)
-            try:
-                font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 48)
-            except:
-                font = ImageFont.load_default()
+            font = self.label_font
             
             # Add labels at the top
             draw.text((width//2 - 100, 50), "OLD POSITION", font=font, fill=(255, 0, 0))
@@ -259,14 +271,14 @@ class TextPositionComparer:
                         metadata['month'] = month
                         
                         # Create old position version
-                        old_path = self.create_old_position_overlay(input_path, metadata)
+                        old_path, old_img = self.create_old_position_overlay(input_path, metadata)
                         
                         # Check if new version exists
                         new_path = os.path.join(self.new_output_dir, filename)
                         
                         if old_path and os.path.exists(new_path):
                             # Create comparison
-                            comparison_path = self.create_comparison_image(old_path, new_path, filename)
+                            comparison_path = self.create_comparison_image(old_img, new_path, filename)
                             if comparison_path:
                                 comparison_count += 1
                                 print(f"  ✅ Created comparison: {os.path.basename(comparison_path)}")
@@ -6,19 +6,42 @@ Generates JSON files optimized for iOS Shortcuts integration
 
 import json
 import os
+import random
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+# GitHub raw URL prefix for the optimized images
+GITHUB_RAW_BASE = "https://raw.githubusercontent.com/kyleplathe/thrasher-lockscreen/main/images/optimized/"
+
 class ShortcutsJSONGenerator:
     def __init__(self):
         self.optimized_dir = Path("../images/optimized")
         self.output_dir = Path("../data/shortcuts")
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+    def save_json(self, path, data):
+        """Write data as indented JSON, using orjson when available"""
+        if orjson:
+            path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+    
     def create_shortcuts_json(self):
         """Create iOS Shortcuts ready JSON files"""
-        # Get all optimized images
-        optimized_images = list(self.optimized_dir.glob("lock_screen_*.jpg"))
+        # Get all optimized images with their sizes in a single directory scan
+        optimized_images = []
+        if self.optimized_dir.is_dir():
+            with os.scandir(self.optimized_dir) as entries:
+                optimized_images = [
+                    (entry.name, entry.stat().st_size) for entry in entries
+                    if entry.is_file() and entry.name.startswith("lock_screen_") and entry.name.endswith(".jpg")
+                ]
         
         if not optimized_images:
             print("❌ No optimized images found. Run the optimizer first.")
@@ -27,24 +50,17 @@ class ShortcutsJSONGenerator:
         print(f"📱 Creating iOS Shortcuts JSON for {len(optimized_images)} images...")
         
         # Create the main covers list for iOS Shortcuts
-        covers_list = []
-        
-        for image_path in optimized_images:
-            # Extract date from filename
-            filename = image_path.stem.replace("lock_screen_", "")
-            
-            # Create GitHub raw URL (assuming this will be hosted on GitHub)
-            github_url = f"https://raw.githubusercontent.com/kyleplathe/thrasher-lockscreen/main/images/optimized/{image_path.name}"
-            
-            cover_info = {
-                "filename": image_path.name,
-                "url": github_url,
-                "date": filename,
-                "size": os.path.getsize(image_path),
+        # (GitHub raw URLs, assuming this will be hosted on GitHub)
+        covers_list = [
+            {
+                "filename": image_name,
+                "url": GITHUB_RAW_BASE + image_name,
+                "date": image_name.removeprefix("lock_screen_").removesuffix(".jpg"),
+                "size": image_size,
                 "optimized": True
             }
-            
-            covers_list.append(cover_info)
+            for image_name, image_size in optimized_images
+        ]
         
         # Create different JSON formats for different use cases
         
@@ -52,7 +68,6 @@ class ShortcutsJSONGenerator:
         simple_urls = [cover["url"] for cover in covers_list]
         
         # 2. Random sample (for testing)
-        import random
         random_sample = random.sample(covers_list, min(50, len(covers_list)))
         
         # 3. Full covers with metadata
@@ -66,9 +81,7 @@ class ShortcutsJSONGenerator:
         files_created['random_sample.json'] = random_sample
         
         for filename, data in files_created.items():
-            output_path = self.output_dir / filename
-            with open(output_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.save_json(self.output_dir / filename, data)
             print(f"✅ Created {filename} with {len(data)} items")
         
         # Create instructions file
@@ -95,9 +108,7 @@ class ShortcutsJSONGenerator:
             }
         }
         
-        instructions_path = self.output_dir / "shortcuts_instructions.json"
-        with open(instructions_path, 'w') as f:
-            json.dump(instructions, f, indent=2)
+        self.save_json(self.output_dir / "shortcuts_instructions.json", instructions)
         
         print(f"✅ Created shortcuts_instructions.json")
         print(f"\n📱 iOS Shortcuts Setup Complete!")
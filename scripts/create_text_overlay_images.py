@@ -7,16 +7,22 @@ Positioned between flashlight and camera buttons
 
 import os
 import json
-from PIL import Image, ImageDraw, ImageFont
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 import requests
 from io import BytesIO
 
 class TextOverlayImageProcessor:
-    def __init__(self):
+    def __init__(self, preview=False):
         self.output_dir = "images/text_overlay_test"
         self.lock_screen_size = (1080, 1920)  # iPhone lock screen ratio
         self.quality = 85  # JPEG quality
         
+        # Preview runs trade a little sharpness for a much faster resize
+        self.preview = preview
+        self.resample = Image.Resampling.BILINEAR if preview else Image.Resampling.LANCZOS
+        
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -28,10 +34,40 @@ class TextOverlayImageProcessor:
         self.text_color = (255, 255, 255)  # White
         self.text_bg_color = (0, 0, 0)  # Black background
         
+        # Load the overlay font once and remember text sizes per string
+        self.font = self.load_font(48)
+        self.text_bbox_cache = {}
+        
+        # Keep-alive session for download_image, created on first use
+        self.session = None
+        
+    def load_font(self, size):
+        """Load the first available system font, falling back to the default"""
+        try:
+            # Try different font paths
+            font_paths = [
+                "/System/Library/Fonts/Helvetica.ttc",  # macOS
+                "/usr/share/fonts/truetype/roboto/Roboto-Regular.ttf",  # Linux
+                "C:/Windows/Fonts/arial.ttf",  # Windows
+            ]
+            
+            for path in font_paths:
+                if os.path.exists(path):
+                    return ImageFont.truetype(path, size)
+                    
+        except Exception:
+            pass
+        
+        # Fallback to default font
+        return ImageFont.load_default()
+    
     def download_image(self, url):
         """Download image from URL"""
         try:
-            response = requests.get(url, timeout=10)
+            if self.session is None:
+                self.session = requests.Session()
+            
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             return BytesIO(response.content)
         except Exception as e:
@@ -45,30 +81,10 @@ class TextOverlayImageProcessor:
             img_with_text = image.copy()
             draw = ImageDraw.Draw(img_with_text)
             
-            # Try to load Roboto font, fallback to default if not available
-            try:
-                # Try different font paths
-                font_paths = [
-                    "/System/Library/Fonts/Helvetica.ttc",  # macOS
-                    "/usr/share/fonts/truetype/roboto/Roboto-Regular.ttf",  # Linux
-                    "C:/Windows/Fonts/arial.ttf",  # Windows
-                ]
-                
-                font = None
-                for path in font_paths:
-                    if os.path.exists(path):
-                        font = ImageFont.truetype(path, 48)
-                        break
-                
-                if font is None:
-                    # Fallback to default font
-                    font = ImageFont.load_default()
-                    
-            except Exception:
-                font = ImageFont.load_default()
-            
-            # Get text dimensions
-            bbox = draw.textbbox((0, 0), text, font=font)
+            # Get text dimensions (cached per distinct string)
+            bbox = self.text_bbox_cache.get(text)
+            if bbox is None:
+                bbox = self.text_bbox_cache[text] = draw.textbbox((0, 0), text, font=self.font)
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
             
@@ -83,7 +99,7 @@ class TextOverlayImageProcessor:
             draw.rectangle([bg_x1, bg_y1, bg_x2, bg_y2], fill=self.text_bg_color)
             
             # Draw text
-            draw.text((self.text_x, self.text_y), text, font=font, fill=self.text_color, anchor="mm")
+            draw.text((self.text_x, self.text_y), text, font=self.font, fill=self.text_color, anchor="mm")
             
             return img_with_text
             
@@ -91,41 +107,21 @@ class TextOverlayImageProcessor:
             print(f"Error adding text overlay: {e}")
             return image
     
-    def process_image_with_text(self, image_data, filename, cover_info):
+    def process_image_with_text(self, input_path, filename, cover_info):
         """Process image and add text overlay"""
         try:
-            # Open image
-            image = Image.open(BytesIO(image_data))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Create black background with lock screen dimensions
-            background = Image.new('RGB', self.lock_screen_size, (0, 0, 0))
-            
-            # Calculate scaling to fit image within lock screen
-            img_ratio = image.width / image.height
-            target_ratio = self.lock_screen_size[0] / self.lock_screen_size[1]
-            
-            if img_ratio > target_ratio:
-                # Image is wider - scale to fit width
-                new_width = self.lock_screen_size[0]
-                new_height = int(new_width / img_ratio)
-            else:
-                # Image is taller - scale to fit height
-                new_height = self.lock_screen_size[1]
-                new_width = int(new_height * img_ratio)
-            
-            # Resize image
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Calculate position to center image
-            x = (self.lock_screen_size[0] - new_width) // 2
-            y = (self.lock_screen_size[1] - new_height) // 2
-            
-            # Paste image onto background
-            background.paste(image, (x, y))
+            # Open image (PIL reads the file directly, no in-memory copy) and
+            # close it as soon as the letterboxed copy exists
+            with Image.open(input_path) as image:
+                # Let libjpeg decode large JPEGs at a reduced scale (no-op for other formats)
+                image.draft('RGB', self.lock_screen_size)
+                
+                # Convert to RGB if necessary
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                
+                # Resize to fit the lock screen and center it on a black background
+                background = ImageOps.pad(image, self.lock_screen_size, method=self.resample, color=(0, 0, 0))
             
             # Create text overlay
             text = f"{cover_info['year']} - {cover_info['month']}"
@@ -137,7 +133,7 @@ class TextOverlayImageProcessor:
             
             # Save image
             output_path = os.path.join(self.output_dir, filename)
-            final_image.save(output_path, 'JPEG', quality=self.quality, optimize=True)
+            final_image.save(output_path, 'JPEG', quality=self.quality, optimize=False, progressive=False)
             
             return output_path
             
@@ -185,35 +181,53 @@ class TextOverlayImageProcessor:
         
         processed_count = 0
         
+        # Collect the covers that have an input image
+        jobs = []
         for cover_info in test_covers:
             filename = cover_info["filename"]
             input_path = f"images/optimized_final/{filename}"
             
             if os.path.exists(input_path):
                 print(f"Processing {filename}...")
-                
-                # Read image data
-                with open(input_path, 'rb') as f:
-                    image_data = f.read()
-                
-                # Process image with text overlay
-                output_path = self.process_image_with_text(image_data, filename, cover_info)
-                
-                if output_path:
-                    processed_count += 1
-                    print(f"✓ Created: {output_path}")
-                else:
-                    print(f"✗ Failed to process: {filename}")
+                jobs.append((input_path, filename, cover_info))
             else:
                 print(f"✗ File not found: {input_path}")
         
+        # Process images with text overlay in parallel
+        with ProcessPoolExecutor(initializer=_init_worker, initargs=(self.preview,)) as executor:
+            results = list(executor.map(_process_in_worker, *zip(*jobs))) if jobs else []
+        
+        for (input_path, filename, cover_info), output_path in zip(jobs, results):
+            if output_path:
+                processed_count += 1
+                print(f"✓ Created: {output_path}")
+            else:
+                print(f"✗ Failed to process: {filename}")
+        
         print(f"\nCompleted! Created {processed_count} test images with text overlays.")
         print(f"Output directory: {self.output_dir}")
         
         return processed_count
 
+# Per-process processor used by worker processes (fonts are loaded once per worker)
+_worker_processor = None
+
+def _init_worker(preview):
+    """Create the processor used by this worker process"""
+    global _worker_processor
+    _worker_processor = TextOverlayImageProcessor(preview=preview)
+
+def _process_in_worker(input_path, filename, cover_info):
+    """Process one image in a worker process"""
+    return _worker_processor.process_image_with_text(input_path, filename, cover_info)
+
 def main():
-    processor = TextOverlayImageProcessor()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--preview', action='store_true',
+                        help='use faster bilinear resizing for quick previews')
+    args = parser.parse_args()
+    
+    processor = TextOverlayImageProcessor(preview=args.preview)
     processor.create_test_images()
 
 if __name__ == "__main__":
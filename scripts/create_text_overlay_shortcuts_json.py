@@ -7,6 +7,23 @@ Generates a JSON file for iOS Shortcuts with all text overlay images
 import os
 import json
 import csv
+import pickle
+from tqdm import tqdm
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+_MONTH_TO_NUM = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'winter': 12  # Winter issue typically December
+}
+
+# GitHub raw URL prefix for the text overlay images
+GITHUB_RAW_BASE = "https://raw.githubusercontent.com/kyleplathe/thrasher-lockscreen/main/images/optimized_final_with_text/"
 
 class TextOverlayShortcutsCreator:
     def __init__(self):
@@ -15,38 +32,63 @@ class TextOverlayShortcutsCreator:
         self.output_file = "shortcuts_text_overlay_covers.json"
         
         # Load 4ply data for metadata
-        self.fourply_data = self.load_4ply_data()
+        self.fourply_data = self.load_cached_4ply_data()
+        
+    def load_cached_4ply_data(self):
+        """Load the 4ply lookup from its pickle cache, rebuilding it when the CSV is newer"""
+        cache_file = self.csv_file + '.pkl'
+        
+        try:
+            if os.path.getmtime(cache_file) >= os.path.getmtime(self.csv_file):
+                with open(cache_file, 'rb') as f:
+                    return pickle.load(f)
+        except Exception:
+            pass  # Missing or unreadable cache, rebuild it
+        
+        fourply_data = self.load_4ply_data()
+        
+        try:
+            with open(cache_file, 'wb') as f:
+                pickle.dump(fourply_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Could not write 4ply cache {cache_file}: {e}")
         
+        return fourply_data
+    
     def load_4ply_data(self):
         """Load 4ply CSV data into a dictionary"""
         fourply_data = {}
         
         with open(self.csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
+            reader = csv.reader(f)
+            header = next(reader)
+            year_idx, month_idx = header.index('year'), header.index('month')
+            for values in reader:
+                year = values[year_idx]
+                month_name = values[month_idx].lower()
+                month = _MONTH_TO_NUM.get(month_name)
+                is_special = month_name in ('summer', 'winter')
+                
+                # Only build a row dict for rows that end up in the lookup
+                if not (month or is_special):
+                    continue
+                row = dict(zip(header, values))
+                
                 # Create key in YYYY_MM format
-                year = row['year']
-                month = self.month_to_number(row['month'])
                 if month:
                     key = f"{year}_{month:02d}"
                     fourply_data[key] = row
                 
                 # Also store by special issue type
-                if row['month'].lower() in ['summer', 'winter']:
-                    special_key = f"{year}_{row['month'].lower()}"
+                if is_special:
+                    special_key = f"{year}_{month_name}"
                     fourply_data[special_key] = row
         
         return fourply_data
     
     def month_to_number(self, month_name):
         """Convert month name to number"""
-        months = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12,
-            'winter': 12  # Winter issue typically December
-        }
-        return months.get(month_name.lower())
+        return _MONTH_TO_NUM.get(month_name.lower())
     
     def get_metadata_for_image(self, filename):
         """Get metadata for an image"""
@@ -80,10 +122,11 @@ class TextOverlayShortcutsCreator:
             return
         
         # Get all image files
-        image_files = []
-        for filename in os.listdir(self.input_dir):
-            if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                image_files.append(filename)
+        with os.scandir(self.input_dir) as entries:
+            image_files = [
+                entry.name for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(('.jpg', '.jpeg', '.png'))
+            ]
         
         print(f"Found {len(image_files)} images to process")
         
@@ -95,24 +138,26 @@ class TextOverlayShortcutsCreator:
             "images": []
         }
         
-        for i, filename in enumerate(image_files):
-            print(f"Processing {i+1}/{len(image_files)}: {filename}")
-            
+        for filename in tqdm(image_files, desc="Building entries", unit="image"):
             # Get metadata
             metadata = self.get_metadata_for_image(filename)
             
             # Create image entry
             image_entry = {
                 "filename": filename,
-                "url": f"https://raw.githubusercontent.com/kyleplathe/thrasher-lockscreen/main/images/optimized_final_with_text/{filename}",
+                "url": GITHUB_RAW_BASE + filename,
                 "metadata": metadata
             }
             
             shortcuts_data["images"].append(image_entry)
         
         # Save JSON file
-        with open(self.output_file, 'w') as f:
-            json.dump(shortcuts_data, f, indent=2)
+        if orjson:
+            with open(self.output_file, 'wb') as f:
+                f.write(orjson.dumps(shortcuts_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.output_file, 'w') as f:
+                json.dump(shortcuts_data, f, indent=2)
         
         print(f"\n✅ Created shortcuts JSON: {self.output_file}")
         print(f"Total images: {len(image_files)}")
@@ -7,7 +7,9 @@ Downloads all verified cover images from the JSON file
 import requests
 import json
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 from pathlib import Path
 
@@ -19,25 +21,50 @@ class ThrasherImageDownloader:
         self.download_dir = Path("../images/original")
         self.download_dir.mkdir(parents=True, exist_ok=True)
         
-    def download_image(self, url, filename):
+        # Concurrent downloads, with a cap on simultaneous requests per host
+        self.max_workers = 16
+        self.per_host_limit = 8
+        self.host_semaphores = {}
+        self.chunk_size = 64 * 1024
+        
+    def create_session(self):
+        """Create a session whose connection pool matches the worker count"""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+        
+    def download_image(self, session, url, filename):
         """Download a single image with error handling"""
+        filepath = self.download_dir / filename
+        partial_path = filepath.with_name(filename + '.part')
+        
         try:
             print(f"Downloading: {filename}")
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            
-            filepath = self.download_dir / filename
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            with self.host_semaphores[urlparse(url).netloc]:
+                with session.get(url, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    
+                    # Stream into a temporary file so failed downloads never look complete
+                    size = 0
+                    with open(partial_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            f.write(chunk)
+                            size += len(chunk)
             
-            print(f"✅ Downloaded: {filename} ({len(response.content)} bytes)")
+            os.replace(partial_path, filepath)
+            print(f"✅ Downloaded: {filename} ({size} bytes)")
             return True
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Failed to download {filename}: {e}")
+            partial_path.unlink(missing_ok=True)
             return False
         except Exception as e:
             print(f"❌ Error downloading {filename}: {e}")
+            partial_path.unlink(missing_ok=True)
             return False
     
     def download_all_images(self):
@@ -58,29 +85,42 @@ class ThrasherImageDownloader:
         successful = 0
         failed = 0
         
-        for i, url in enumerate(urls, 1):
+        # List existing files once instead of checking each one
+        with os.scandir(self.download_dir) as entries:
+            existing_files = {entry.name for entry in entries if entry.is_file()}
+        
+        downloads = []
+        for url in urls:
             # Extract filename from URL
             parsed_url = urlparse(url)
             filename = os.path.basename(parsed_url.path)
             
-            # Skip if file already exists
-            if (self.download_dir / filename).exists():
+            # Skip if file already exists (or is already queued under the same name)
+            if filename in existing_files:
                 print(f"⏭️  Skipping {filename} (already exists)")
                 successful += 1
                 continue
             
-            # Download the image
-            if self.download_image(url, filename):
-                successful += 1
-            else:
-                failed += 1
+            existing_files.add(filename)
+            downloads.append((url, filename))
             
-            # Progress update
-            if i % 10 == 0:
-                print(f"📊 Progress: {i}/{len(urls)} ({i/len(urls)*100:.1f}%)")
+            # Create each host's semaphore up front so worker threads only read the dict
+            if parsed_url.netloc not in self.host_semaphores:
+                self.host_semaphores[parsed_url.netloc] = threading.Semaphore(self.per_host_limit)
+        
+        # Download the remaining images concurrently
+        with self.create_session() as session, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.download_image, session, url, filename) for url, filename in downloads]
             
-            # Small delay to be respectful
-            time.sleep(0.5)
+            for i, future in enumerate(as_completed(futures), 1):
+                if future.result():
+                    successful += 1
+                else:
+                    failed += 1
+                
+                # Progress update
+                if i % 10 == 0:
+                    print(f"📊 Progress: {i}/{len(downloads)} ({i/len(downloads)*100:.1f}%)")
         
         print(f"\n🎉 Download Complete!")
         print(f"✅ Successful: {successful}")
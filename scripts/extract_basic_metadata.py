@@ -7,15 +7,94 @@ Extracts basic metadata from image filenames and creates a foundation for manual
 import os
 import json
 import re
+from bisect import bisect_right
 from datetime import datetime
+from tqdm import tqdm
+
+_MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+# Filename patterns, compiled once and tried in order
+_DATE_RES = [
+    re.compile(r'(\d{4})_(\d{2})'),  # YYYY_MM format
+    re.compile(r'(\d{2})(\d{2})'),   # YYMM format (like 2505 for May 2025)
+]
+
+# Common skater name patterns in Thrasher covers
+_SKATER_RES = [
+    re.compile(r'([A-Z][a-z]+_[A-Z][a-z]+)'),  # First_Last
+    re.compile(r'([A-Z][a-z]+_[A-Z][a-z]+_[A-Z][a-z]+)'),  # First_Middle_Last
+]
+
+_LOC_RES = [
+    re.compile(r'in_([A-Z][a-z]+)'),  # in_[Location]
+    re.compile(r'at_([A-Z][a-z]+)'),  # at_[Location]
+]
+
+TRICK_KEYWORDS = [
+    'kickflip', 'heelflip', 'ollie', '360', '180', 'shove', 'varial',
+    'double', 'triple', 'quad', 'backside', 'frontside', 'switch',
+    'nollie', 'fakie', 'nose', 'tail', 'grind', 'slide', 'manual',
+    '50_50', 'boardslide', 'lipslide', 'crooked', 'smith', 'feeble',
+    'nosegrind', 'tailgrind', 'overcrook', 'salad', 'soup', 'burnett'
+]
+
+OBSTACLE_KEYWORDS = [
+    'rail', 'ledge', 'stairs', 'gap', 'bank', 'quarter', 'half',
+    'ramp', 'bowl', 'pool', 'curb', 'handrail', 'kicker', 'funbox',
+    'pyramid', 'spine', 'wall', 'wallride', 'tree', 'pole', 'bench'
+]
+
+def compile_keywords(keywords):
+    """Compile keywords into one regex that reports a match at every position
+    
+    Longer keywords are tried first, so each match also implies the shorter
+    keywords it contains (e.g. 'nosegrind' implies 'nose' and 'grind').
+    """
+    alternation = '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    implied = {keyword: {other for other in keywords if other in keyword} for keyword in keywords}
+    return re.compile(f'(?=({alternation}))'), implied
+
+def find_keywords(text, keywords, compiled):
+    """Return the keywords that occur anywhere in text, in list order"""
+    pattern, implied = compiled
+    found = set()
+    for match in pattern.findall(text):
+        found |= implied[match]
+    return [keyword for keyword in keywords if keyword in found]
+
+def find_keywords_in_names(names, keywords, compiled):
+    """Return find_keywords() results for many names from one scan
+    
+    The names are joined into a single newline-separated corpus and each
+    match is mapped back to its name by line offset.
+    """
+    pattern, implied = compiled
+    corpus = '\n'.join(names).lower()
+    line_starts = [0] + [match.end() for match in re.finditer('\n', corpus)]
+    
+    found = [set() for _ in names]
+    for match in pattern.finditer(corpus):
+        found[bisect_right(line_starts, match.start()) - 1] |= implied[match.group(1)]
+    
+    return [[keyword for keyword in keywords if keyword in hits] for hits in found]
+
+_TRICK_KEYWORDS_RE = compile_keywords(TRICK_KEYWORDS)
+_OBSTACLE_KEYWORDS_RE = compile_keywords(OBSTACLE_KEYWORDS)
 
 class BasicMetadataExtractor:
     def __init__(self):
         self.input_dir = "images/optimized_final_fixed"
         self.output_file = "basic_metadata_extracted.json"
         
-    def extract_metadata_from_filename(self, filename):
-        """Extract basic metadata from filename"""
+    def extract_metadata_from_filename(self, filename, tricks=None, obstacles=None):
+        """Extract basic metadata from filename
+        
+        Precomputed trick and obstacle lists can be passed in when a whole
+        directory has already been scanned with find_keywords_in_names().
+        """
         # Remove file extension
         name = os.path.splitext(filename)[0]
         
@@ -35,73 +114,40 @@ class BasicMetadataExtractor:
         }
         
         # Extract date information
-        date_patterns = [
-            r'(\d{4})_(\d{2})',  # YYYY_MM format
-            r'(\d{2})(\d{2})',   # YYMM format (like 2505 for May 2025)
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, name)
+        for rx in _DATE_RES:
+            match = rx.search(name)
             if match:
-                if len(match.groups()) == 2:
-                    year, month = match.groups()
-                    
-                    # Handle 2-digit year format
-                    if len(year) == 2:
-                        year = "20" + year
-                    
-                    metadata["year"] = year
-                    metadata["month"] = month
-                    metadata["date"] = f"{year}-{month}-01"
-                    metadata["month_name"] = self.get_month_name(int(month))
-                    break
-        
-        # Extract potential skater names (common patterns in Thrasher covers)
-        skater_patterns = [
-            r'([A-Z][a-z]+_[A-Z][a-z]+)',  # First_Last
-            r'([A-Z][a-z]+_[A-Z][a-z]+_[A-Z][a-z]+)',  # First_Middle_Last
-        ]
-        
-        for pattern in skater_patterns:
-            matches = re.findall(pattern, name)
-            for match in matches:
+                year, month = match.groups()
+                
+                # Handle 2-digit year format
+                if len(year) == 2:
+                    year = "20" + year
+                
+                metadata["year"] = year
+                metadata["month"] = month
+                metadata["date"] = f"{year}-{month}-01"
+                metadata["month_name"] = self.get_month_name(int(month))
+                break
+        
+        # Extract potential skater names
+        for rx in _SKATER_RES:
+            for match in rx.findall(name):
                 skater = match.replace('_', ' ')
                 if skater not in metadata["skaters"]:
                     metadata["skaters"].append(skater)
         
-        # Extract potential tricks from filename
-        trick_keywords = [
-            'kickflip', 'heelflip', 'ollie', '360', '180', 'shove', 'varial',
-            'double', 'triple', 'quad', 'backside', 'frontside', 'switch',
-            'nollie', 'fakie', 'nose', 'tail', 'grind', 'slide', 'manual',
-            '50_50', 'boardslide', 'lipslide', 'crooked', 'smith', 'feeble',
-            'nosegrind', 'tailgrind', 'overcrook', 'salad', 'soup', 'burnett'
-        ]
-        
+        # Extract potential tricks and obstacles in one scan each
         name_lower = name.lower()
-        for trick in trick_keywords:
-            if trick in name_lower:
-                metadata["tricks"].append(trick)
-        
-        # Extract potential obstacles
-        obstacle_keywords = [
-            'rail', 'ledge', 'stairs', 'gap', 'bank', 'quarter', 'half',
-            'ramp', 'bowl', 'pool', 'curb', 'handrail', 'kicker', 'funbox',
-            'pyramid', 'spine', 'wall', 'wallride', 'tree', 'pole', 'bench'
-        ]
-        
-        for obstacle in obstacle_keywords:
-            if obstacle in name_lower:
-                metadata["obstacles"].append(obstacle)
+        if tricks is None:
+            tricks = find_keywords(name_lower, TRICK_KEYWORDS, _TRICK_KEYWORDS_RE)
+        if obstacles is None:
+            obstacles = find_keywords(name_lower, OBSTACLE_KEYWORDS, _OBSTACLE_KEYWORDS_RE)
+        metadata["tricks"] = tricks
+        metadata["obstacles"] = obstacles
         
         # Extract potential locations
-        location_patterns = [
-            r'in_([A-Z][a-z]+)',  # in_[Location]
-            r'at_([A-Z][a-z]+)',  # at_[Location]
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, name)
+        for rx in _LOC_RES:
+            match = rx.search(name)
             if match:
                 metadata["location"] = match.group(1)
                 break
@@ -110,11 +156,7 @@ class BasicMetadataExtractor:
     
     def get_month_name(self, month_num):
         """Convert month number to name"""
-        months = [
-            'January', 'February', 'March', 'April', 'May', 'June',
-            'July', 'August', 'September', 'October', 'November', 'December'
-        ]
-        return months[month_num - 1] if 1 <= month_num <= 12 else ''
+        return _MONTHS[month_num - 1] if 1 <= month_num <= 12 else ''
     
     def process_all_images(self):
         """Process all images to extract basic metadata"""
@@ -125,10 +167,11 @@ class BasicMetadataExtractor:
             return
         
         # Get all image files
-        image_files = []
-        for filename in os.listdir(self.input_dir):
-            if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                image_files.append(filename)
+        with os.scandir(self.input_dir) as entries:
+            image_files = [
+                entry.name for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(('.jpg', '.jpeg', '.png'))
+            ]
         
         print(f"Found {len(image_files)} images to process")
         
@@ -139,11 +182,15 @@ class BasicMetadataExtractor:
             "metadata": {}
         }
         
-        for i, filename in enumerate(image_files):
-            print(f"Processing {i+1}/{len(image_files)}: {filename}")
-            
+        # Detect trick and obstacle keywords for all filenames at once
+        names = [os.path.splitext(filename)[0] for filename in image_files]
+        all_tricks = find_keywords_in_names(names, TRICK_KEYWORDS, _TRICK_KEYWORDS_RE)
+        all_obstacles = find_keywords_in_names(names, OBSTACLE_KEYWORDS, _OBSTACLE_KEYWORDS_RE)
+        
+        for filename, tricks, obstacles in tqdm(zip(image_files, all_tricks, all_obstacles),
+                                                total=len(image_files), desc="Extracting metadata", unit="image"):
             # Extract metadata from filename
-            metadata = self.extract_metadata_from_filename(filename)
+            metadata = self.extract_metadata_from_filename(filename, tricks, obstacles)
             all_metadata["metadata"][filename] = metadata
         
         # Save metadata
@@ -4,15 +4,90 @@ Final Comprehensive Thrasher Magazine Covers Scraper
 Extracts ALL covers from 1981-2025 to get the complete 537 covers
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
 import json
 import os
-from urllib.parse import urljoin
-import time
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 import random
+import sqlite3
+import time
+import aiohttp
+import asyncio
 from datetime import datetime
+from collections import defaultdict
+from itertools import product
+from rate_limit import AsyncRateLimiter
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # Fall back to loading the whole file
+    ijson = None
+
+def canonicalize_url(url):
+    """Normalize a URL so trivially different spellings compare equal
+    
+    Lowercases the scheme and host, drops default ports and fragments and
+    sorts query parameters. The path is left untouched (it is case-sensitive).
+    """
+    parts = urlsplit(url)
+    if not parts.hostname:
+        return url
+    
+    netloc = parts.hostname.lower()
+    if parts.port and parts.port not in (80, 443):
+        netloc += f":{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path, query, ''))
+
+_MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+# Cover URL patterns per era: (source, years, path templates). Templates use
+# {month} (name), {year}, {mm} (two-digit month) and {yy} (two-digit year).
+PATTERN_ERAS = [
+    # 1981-1999: /images/image/Covers Section/images/[Month][Year].jpg
+    ('pattern_1981_1999', range(1981, 2000), [
+        "/images/image/Covers Section/images/{month}{year}.jpg",
+    ]),
+    # 2000-2008: /images/image/Covers Section/images/[Month][Year][sfw].jpg
+    ('pattern_2000_2008', range(2000, 2009), [
+        "/images/image/Covers Section/images/{month}{year}.jpg",
+        "/images/image/Covers Section/images/{month}{year}sfw.jpg",
+        "/images/image/Covers Section/images/{month}{year}_sfw.jpg",
+    ]),
+    # 2009-2019: Various patterns
+    ('pattern_2009_2019', range(2009, 2020), [
+        "/images/image/Covers Section/images/{year}_{mm}_Thrasher_Magazine_Cover_1080.jpg",
+        "/images/image/Covers Section/images/{year}_{mm}_Thrasher_Cover_1080.jpg",
+        "/images/image/Covers Section/images/{mm}_{yy}_Thrasher_Cover_1080.jpg",
+        "/images/image/Covers Section/images/{yy}_{mm}_Thrasher_Cover_1080.jpg",
+        "/images/image/Covers Section/images/{year}_{mm}.jpg",
+        "/images/image/Covers Section/images/{mm}_{year}.jpg",
+        "/images/image/Covers Section/images/{year}_{mm}sfw.jpg",
+        "/images/image/Covers Section/images/{mm}{year}sfw.jpg",
+        "/images/CV1TH{mm}{yy}.jpg",
+        "/images/CV1TH{mm}{yy}_Sml.jpg",
+    ]),
+    # 2020-2025: Modern patterns
+    ('pattern_2020_2025', range(2020, 2026), [
+        "/images/{mm}_{yy}_Thrasher_Cover_1080.jpg",
+        "/images/image/Covers_Archive/{yy}_{mm}_Thrasher_Cover_1080.jpg",
+        "/images/image/Covers_Archive/{yy}_{mm}_Thrasher-Cover_1080.jpg",
+        "/images/{mm}{yy}_Thrasher_Cover_1080.jpg",
+        "/images/image/Covers Section/images/{year}_{mm}_Thrasher_Magazine_Cover_1080.jpg",
+        "/images/{yy}_{mm}_Thrasher_Cover_1080.jpg",
+        "/images/CV1TH{mm}{yy}.jpg",
+        "/images/CV1TH{mm}{yy}_Sml.jpg",
+    ]),
+]
 
 class FinalComprehensiveScraper:
     def __init__(self):
@@ -21,18 +96,34 @@ class FinalComprehensiveScraper:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.all_covers = []
-        
+        self.range_fallbacks = 0
+        
+        # Probe results are cached on disk so reruns only re-probe stale URLs
+        self.probe_cache_db = 'covers_cache.db'
+        self.probe_cache_max_age = 7 * 86400
+        # Only definitive answers are cached; throttling (429), server errors
+        # and refused requests are always probed again
+        self.probe_cache_statuses = (200, 206, 404, 410)
+        self.probe_cache = {}
+        self.probe_results = []
+        
+    def iter_analysis_items(self, path):
+        """Yield each covers_found entry, streaming the file when ijson is available"""
+        if ijson:
+            with open(path, 'rb') as f:
+                yield from ijson.items(f, 'covers_found.item', use_float=True)
+        else:
+            with open(path, 'r') as f:
+                yield from json.load(f).get('covers_found', [])
+    
     def extract_all_urls_from_analysis(self):
         """Extract ALL cover URLs from the analysis results"""
         print("Extracting all cover URLs from analysis results...")
         
-        with open('thrasher_analysis_results.json', 'r') as f:
-            data = json.load(f)
-        
         covers = []
         seen_urls = set()
         
-        for item in data.get('covers_found', []):
+        for item in self.iter_analysis_items('thrasher_analysis_results.json'):
             src = item.get('image_url', '')
             alt = item.get('alt_text', '')
             date = item.get('date')
@@ -41,8 +132,8 @@ class FinalComprehensiveScraper:
             if any(ui_element in src for ui_element in ['zoom.png', 'read.png', 'watch.png']):
                 continue
             
-            # Skip if no date or already seen
-            if not date or src in seen_urls:
+            # Skip if no date
+            if not date:
                 continue
             
             # Normalize URL
@@ -53,7 +144,11 @@ class FinalComprehensiveScraper:
             else:
                 continue
             
-            seen_urls.add(src)
+            # Skip if already seen (under any equivalent spelling)
+            full_url = canonicalize_url(full_url)
+            if full_url in seen_urls:
+                continue
+            seen_urls.add(full_url)
             
             cover_info = {
                 'date': date,
@@ -74,132 +169,216 @@ class FinalComprehensiveScraper:
         
         all_patterns = []
         
-        # Pattern 1: 1981-1999: /images/image/Covers Section/images/[Month][Year].jpg
-        months = [
-            'January', 'February', 'March', 'April', 'May', 'June',
-            'July', 'August', 'September', 'October', 'November', 'December'
-        ]
-        
-        for year in range(1981, 2000):
-            for month in months:
-                pattern = f"/images/image/Covers Section/images/{month}{year}.jpg"
-                date = f"{year:04d}-{months.index(month)+1:02d}-01"
-                
-                all_patterns.append({
-                    'date': date,
-                    'url': self.base_url + pattern,
-                    'pattern': pattern,
-                    'source': 'pattern_1981_1999',
-                    'verified': False
-                })
-        
-        # Pattern 2: 2000-2008: /images/image/Covers Section/images/[Month][Year][sfw].jpg
-        for year in range(2000, 2009):
-            for month in months:
-                # Try multiple variations for 2000-2008
-                patterns_2000_2008 = [
-                    f"/images/image/Covers Section/images/{month}{year}.jpg",
-                    f"/images/image/Covers Section/images/{month}{year}sfw.jpg",
-                    f"/images/image/Covers Section/images/{month}{year}_sfw.jpg",
-                    f"/images/image/Covers Section/images/{month}{year}sfw.jpg",
-                    f"/images/image/Covers Section/images/{month}{year}.jpg"
-                ]
-                
-                for pattern in patterns_2000_2008:
-                    date = f"{year:04d}-{months.index(month)+1:02d}-01"
-                    all_patterns.append({
-                        'date': date,
-                        'url': self.base_url + pattern,
-                        'pattern': pattern,
-                        'source': 'pattern_2000_2008',
-                        'verified': False
-                    })
-        
-        # Pattern 3: 2009-2019: Various patterns
-        for year in range(2009, 2020):
-            for month in range(1, 13):
-                month_str = f"{month:02d}"
-                short_year = str(year)[-2:]
-                
-                # Multiple pattern variations for 2009-2019
-                patterns_2009_2019 = [
-                    f"/images/image/Covers Section/images/{year}_{month_str}_Thrasher_Magazine_Cover_1080.jpg",
-                    f"/images/image/Covers Section/images/{year}_{month_str}_Thrasher_Cover_1080.jpg",
-                    f"/images/image/Covers Section/images/{month_str}_{short_year}_Thrasher_Cover_1080.jpg",
-                    f"/images/image/Covers Section/images/{short_year}_{month_str}_Thrasher_Cover_1080.jpg",
-                    f"/images/image/Covers Section/images/{year}_{month_str}.jpg",
-                    f"/images/image/Covers Section/images/{month_str}_{year}.jpg",
-                    f"/images/image/Covers Section/images/{year}_{month_str}sfw.jpg",
-                    f"/images/image/Covers Section/images/{month_str}{year}sfw.jpg",
-                    f"/images/CV1TH{month_str}{short_year}.jpg",
-                    f"/images/CV1TH{month_str}{short_year}_Sml.jpg"
-                ]
+        for source, years, templates in PATTERN_ERAS:
+            # Bake the base URL into the templates so each URL is one format call
+            url_templates = [self.base_url + template for template in templates]
+            
+            for year, (month_num, month) in product(years, enumerate(_MONTHS, 1)):
+                fields = {'month': month, 'year': year, 'mm': f"{month_num:02d}", 'yy': f"{year % 100:02d}"}
+                date = f"{year:04d}-{month_num:02d}-01"
                 
-                for pattern in patterns_2009_2019:
-                    date = f"{year:04d}-{month:02d}-01"
+                for variant, url_template in enumerate(url_templates):
                     all_patterns.append({
                         'date': date,
-                        'url': self.base_url + pattern,
-                        'pattern': pattern,
-                        'source': 'pattern_2009_2019',
+                        'url': url_template.format_map(fields),
+                        'variant': variant,
+                        'source': source,
                         'verified': False
                     })
         
-        # Pattern 4: 2020-2025: Modern patterns
-        for year in range(2020, 2026):
-            for month in range(1, 13):
-                short_year = str(year)[-2:]
-                month_str = f"{month:02d}"
-                
-                modern_patterns = [
-                    f"/images/{month_str}_{short_year}_Thrasher_Cover_1080.jpg",
-                    f"/images/image/Covers_Archive/{short_year}_{month_str}_Thrasher_Cover_1080.jpg",
-                    f"/images/image/Covers_Archive/{short_year}_{month_str}_Thrasher-Cover_1080.jpg",
-                    f"/images/{month_str}{short_year}_Thrasher_Cover_1080.jpg",
-                    f"/images/image/Covers Section/images/{year}_{month_str}_Thrasher_Magazine_Cover_1080.jpg",
-                    f"/images/{short_year}_{month_str}_Thrasher_Cover_1080.jpg",
-                    f"/images/CV1TH{month_str}{short_year}.jpg",
-                    f"/images/CV1TH{month_str}{short_year}_Sml.jpg"
-                ]
-                
-                for pattern in modern_patterns:
-                    date = f"{year:04d}-{month:02d}-01"
-                    all_patterns.append({
-                        'date': date,
-                        'url': self.base_url + pattern,
-                        'pattern': pattern,
-                        'source': 'pattern_2020_2025',
-                        'verified': False
-                    })
+        # Drop repeated variations before probing
+        unique_patterns = {}
+        for pattern_info in all_patterns:
+            unique_patterns.setdefault(canonicalize_url(pattern_info['url']), pattern_info)
+        all_patterns = list(unique_patterns.values())
         
         print(f"Generated {len(all_patterns)} potential patterns")
         return all_patterns
     
+    async def _status_async(self, session, limiter, url):
+        """HEAD the URL, falling back to a one-byte ranged GET if HEAD is refused
+        
+        Some CDNs answer HEAD with 403/405/501 even though GET works.
+        """
+        async with session.head(url, allow_redirects=False) as response:
+            status = response.status
+        
+        if status in (403, 405, 501):
+            self.range_fallbacks += 1
+            await limiter.wait()
+            async with session.get(url, headers={'Range': 'bytes=0-0'}, allow_redirects=False) as response:
+                status = response.status
+                if status in (200, 206):
+                    await response.content.read(1)
+        
+        return status
+    
+    def connect_probe_cache(self):
+        """Open the probe cache database, creating its table if needed"""
+        conn = sqlite3.connect(self.probe_cache_db)
+        conn.execute('CREATE TABLE IF NOT EXISTS probe(url TEXT PRIMARY KEY, status INT, ts INT)')
+        return conn
+    
+    def load_probe_cache(self):
+        """Load the definitive probe statuses checked within the cache's max age"""
+        placeholders = ', '.join('?' * len(self.probe_cache_statuses))
+        conn = self.connect_probe_cache()
+        try:
+            rows = conn.execute(f'SELECT url, status FROM probe WHERE ts > ? AND status IN ({placeholders})',
+                                (int(time.time()) - self.probe_cache_max_age, *self.probe_cache_statuses))
+            return dict(rows)
+        finally:
+            conn.close()
+    
+    def save_probe_results(self, results):
+        """Store definitive (url, status) probe results with the current time"""
+        now = int(time.time())
+        conn = self.connect_probe_cache()
+        try:
+            conn.executemany('INSERT OR REPLACE INTO probe(url, status, ts) VALUES (?, ?, ?)',
+                             [(url, status, now) for url, status in results
+                              if status in self.probe_cache_statuses])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    async def _head_async(self, session, semaphore, limiter, cover):
+        """Check one cover URL without blocking the others"""
+        status = self.probe_cache.get(cover['url'])
+        if status is not None:
+            return self._record_status(cover, status)
+        
+        async with semaphore:
+            # Retry once after a short backoff, like a urllib3 Retry(total=1)
+            for attempt in range(2):
+                await limiter.wait()
+                try:
+                    status = await self._status_async(session, limiter, cover['url'])
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if attempt == 0:
+                        await asyncio.sleep(0.1)
+                        continue
+                    print(f"✗ {cover['date']}: Connection failed")
+                    return None
+        
+        self.probe_results.append((cover['url'], status))
+        return self._record_status(cover, status)
+    
+    def _record_status(self, cover, status):
+        """Mark the cover verified if its status shows the URL works"""
+        if status in (200, 206):
+            cover['verified'] = True
+            print(f"✓ {cover['date']}: {cover['url']}")
+            return cover
+        
+        print(f"✗ {cover['date']}: {status}")
+        return None
+    
+    async def _probe_group_async(self, session, semaphore, limiter, covers, analysis_tasks):
+        """Probe one year's pattern variants month by month
+        
+        Months whose analysis cover (probed concurrently in analysis_tasks)
+        turns out to be verified are skipped. Once the first three hits of
+        the year all come from the same variant, the remaining months only
+        try that variant.
+        """
+        covers_by_date = defaultdict(list)
+        for cover in covers:
+            covers_by_date[cover['date']].append(cover)
+        
+        verified = []
+        hits = defaultdict(int)
+        winner = None
+        
+        for date, date_covers in covers_by_date.items():
+            # The analysis already found this month's cover
+            if date in analysis_tasks and any(await asyncio.gather(*analysis_tasks[date])):
+                continue
+            
+            if winner is not None:
+                date_covers = [cover for cover in date_covers if cover.get('variant') == winner]
+            
+            results = await asyncio.gather(*[self._head_async(session, semaphore, limiter, cover) for cover in date_covers])
+            for cover in results:
+                if cover:
+                    verified.append(cover)
+                    hits[cover.get('variant')] += 1
+            
+            if winner is None and len(hits) == 1 and sum(hits.values()) >= 3:
+                winner = next(iter(hits))
+        
+        return verified
+    
+    async def _test_urls_async(self, covers, concurrency=20, rate=15):
+        """HEAD every cover URL concurrently over one keep-alive session"""
+        # Cap in-flight requests and the request rate (be respectful)
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = AsyncRateLimiter(rate)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=5)
+        
+        # Pattern covers are probed per (source, year) so dead variants can be
+        # dropped early; everything else (the analysis covers) on its own
+        groups = defaultdict(list)
+        single_covers = []
+        for cover in covers:
+            if 'variant' in cover:
+                groups[(cover['source'], cover['date'][:4])].append(cover)
+            else:
+                single_covers.append(cover)
+        
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            # Start the single covers first so pattern groups can check, per
+            # month, whether an analysis cover already verified that date
+            analysis_tasks = defaultdict(list)
+            single_tasks = []
+            for cover in single_covers:
+                task = asyncio.create_task(self._head_async(session, semaphore, limiter, cover))
+                analysis_tasks[cover['date']].append(task)
+                single_tasks.append(task)
+            
+            group_tasks = [
+                self._probe_group_async(session, semaphore, limiter, group, analysis_tasks)
+                for group in groups.values()
+            ]
+            group_results = await asyncio.gather(*group_tasks)
+            single_results = await asyncio.gather(*single_tasks)
+        
+        # Return verified covers in their input order
+        verified = {id(cover) for cover in single_results if cover}
+        verified.update(id(cover) for group_verified in group_results for cover in group_verified)
+        return [cover for cover in covers if id(cover) in verified]
+    
     def test_url_accessibility(self, urls, max_tests=None):
         """Test which URLs are accessible"""
         if max_tests is None:
             max_tests = len(urls)
         
-        accessible_urls = []
-        
         print(f"Testing {min(max_tests, len(urls))} URLs for accessibility...")
         
-        for i, cover in enumerate(urls[:max_tests]):
-            try:
-                response = requests.head(cover['url'], headers=self.headers, timeout=5)
-                if response.status_code == 200:
-                    cover['verified'] = True
-                    accessible_urls.append(cover)
-                    print(f"✓ {cover['date']}: {cover['url']}")
-                else:
-                    print(f"✗ {cover['date']}: {response.status_code}")
-            except:
-                print(f"✗ {cover['date']}: Connection failed")
-            
-            # Be respectful with requests
-            time.sleep(0.1)
+        self.range_fallbacks = 0
+        self.probe_cache = self.load_probe_cache()
+        self.probe_results = []
+        if self.probe_cache:
+            print(f"Reusing {len(self.probe_cache)} cached probe results from {self.probe_cache_db}")
+        
+        verified = asyncio.run(self._test_urls_async(urls[:max_tests]))
+        self.save_probe_results(self.probe_results)
+        
+        if self.range_fallbacks:
+            print(f"Retried {self.range_fallbacks} refused HEAD requests as ranged GETs")
         
-        return accessible_urls
+        return verified
+    
+    def save_json(self, path, data):
+        """Write data as indented JSON, using orjson when available"""
+        if orjson:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
     
     def create_final_comprehensive_list(self):
         """Create the final comprehensive list of all available covers"""
@@ -210,19 +389,19 @@ class FinalComprehensiveScraper:
         # Extract all URLs from analysis results
         analysis_covers = self.extract_all_urls_from_analysis()
         
-        # Generate comprehensive patterns
-        pattern_covers = self.generate_all_comprehensive_patterns()
-        
-        # Test analysis covers first (these are more likely to work)
-        print("\nTesting analysis results covers...")
-        verified_analysis = self.test_url_accessibility(analysis_covers, max_tests=300)
-        
-        # Test pattern covers
-        print("\nTesting generated pattern covers...")
-        verified_patterns = self.test_url_accessibility(pattern_covers, max_tests=1000)
+        # Generate comprehensive patterns, skipping URLs the analysis already has
+        analysis_covers = analysis_covers[:300]
+        analysis_urls = {cover['url'] for cover in analysis_covers}
+        pattern_covers = [
+            cover for cover in self.generate_all_comprehensive_patterns()
+            if canonicalize_url(cover['url']) not in analysis_urls
+        ]
         
-        # Combine all covers
-        all_covers = verified_analysis + verified_patterns
+        # Test the analysis covers (these are more likely to work) and pattern
+        # covers in one concurrent pass; a month's patterns are only probed if
+        # its analysis cover doesn't verify. Results keep this order and their source
+        print("\nTesting analysis results and generated pattern covers...")
+        all_covers = self.test_url_accessibility(analysis_covers + pattern_covers[:1000])
         
         # Remove duplicates based on date
         unique_covers = {}
@@ -250,7 +429,13 @@ class FinalComprehensiveScraper:
         # Format 3: Date-URL pairs
         date_url_pairs = [{'date': cover['date'], 'url': cover['url']} for cover in covers_list]
         
-        # Format 4: Categorized by source
+        # Format 4: Categorized by source; pattern covers also list their
+        # path-only pattern, derived here for the kept covers only
+        base_len = len(self.base_url)
+        for cover in covers_list:
+            if cover.get('source', '').startswith('pattern_'):
+                cover['pattern'] = cover['url'][base_len:]
+        
         analysis_covers = [cover for cover in covers_list if cover.get('source') == 'analysis_results']
         pattern_1981_1999_covers = [cover for cover in covers_list if cover.get('source') == 'pattern_1981_1999']
         pattern_2000_2008_covers = [cover for cover in covers_list if cover.get('source') == 'pattern_2000_2008']
@@ -276,8 +461,7 @@ class FinalComprehensiveScraper:
         files_created['random_all_sample.json'] = random_all
         
         for filename, data in files_created.items():
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.save_json(filename, data)
             print(f"Created {filename} with {len(data)} items")
         
         # Create comprehensive instructions
@@ -313,8 +497,7 @@ class FinalComprehensiveScraper:
             }
         }
         
-        with open('final_comprehensive_instructions.json', 'w') as f:
-            json.dump(instructions, f, indent=2)
+        self.save_json('final_comprehensive_instructions.json', instructions)
         
         return covers_list
 
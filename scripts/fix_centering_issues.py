@@ -5,8 +5,16 @@ Fixes centering issues for iPhone 14 Pro Max lock screen images
 """
 
 import os
-from PIL import Image
+import PIL
+from PIL import Image, features
 import json
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
 
 class CenteringFixProcessor:
     def __init__(self):
@@ -16,11 +24,18 @@ class CenteringFixProcessor:
         self.lock_screen_size = (1179, 2556)  # Updated for iPhone 14 Pro Max
         self.quality = 85
         
+        # Black letterbox template, created lazily so the processor stays cheap
+        # to send to worker processes
+        self._bg_template = None
+        
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
         
     def fix_image_centering(self, input_path, filename):
-        """Fix image centering for iPhone 14 Pro Max"""
+        """Fix image centering for iPhone 14 Pro Max
+        
+        Returns the output path and the encoded file size.
+        """
         try:
             # Open image
             image = Image.open(input_path)
@@ -29,41 +44,67 @@ class CenteringFixProcessor:
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Create black background with iPhone 14 Pro Max dimensions
-            background = Image.new('RGB', self.lock_screen_size, (0, 0, 0))
-            
-            # Calculate scaling to fit image within lock screen
-            img_ratio = image.width / image.height
-            target_ratio = self.lock_screen_size[0] / self.lock_screen_size[1]
+            # Copy the black background with iPhone 14 Pro Max dimensions
+            if self._bg_template is None:
+                self._bg_template = Image.new('RGB', self.lock_screen_size, (0, 0, 0))
+            background = self._bg_template.copy()
             
-            if img_ratio > target_ratio:
-                # Image is wider - scale to fit width
-                new_width = self.lock_screen_size[0]
-                new_height = int(new_width / img_ratio)
+            if image.width > self.lock_screen_size[0] or image.height > self.lock_screen_size[1]:
+                # Shrink in place to fit within lock screen, keeping aspect ratio
+                image.thumbnail(self.lock_screen_size, Image.Resampling.LANCZOS)
             else:
-                # Image is taller - scale to fit height
-                new_height = self.lock_screen_size[1]
-                new_width = int(new_height * img_ratio)
-            
-            # Resize image with high quality
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                # thumbnail() never enlarges, so scale small images up to fit
+                img_ratio = image.width / image.height
+                target_ratio = self.lock_screen_size[0] / self.lock_screen_size[1]
+                
+                if img_ratio > target_ratio:
+                    # Image is wider - scale to fit width
+                    new_width = self.lock_screen_size[0]
+                    new_height = int(new_width / img_ratio)
+                else:
+                    # Image is taller - scale to fit height
+                    new_height = self.lock_screen_size[1]
+                    new_width = int(new_height * img_ratio)
+                
+                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
             # Calculate position to center image perfectly
-            x = (self.lock_screen_size[0] - new_width) // 2
-            y = (self.lock_screen_size[1] - new_height) // 2
+            x = (self.lock_screen_size[0] - image.width) // 2
+            y = (self.lock_screen_size[1] - image.height) // 2
             
             # Paste image onto background
             background.paste(image, (x, y))
             
+            # Encode in memory so the size is known without stat'ing the output;
+            # skipping the optimize pass roughly halves encode time
+            buffer = BytesIO()
+            background.save(buffer, 'JPEG', quality=self.quality, subsampling=2, progressive=False)
+            
             # Save image
             output_path = os.path.join(self.output_dir, filename)
-            background.save(output_path, 'JPEG', quality=self.quality, optimize=True)
+            with open(output_path, 'wb') as f:
+                f.write(buffer.getvalue())
             
-            return output_path
+            return output_path, buffer.tell()
             
         except Exception as e:
             print(f"Error processing image {filename}: {e}")
-            return None
+            return None, None
+    
+    def save_json(self, path, data):
+        """Write data as indented JSON, using orjson when available"""
+        if orjson:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+    
+    def describe_pillow_backend(self):
+        """Describe the active Pillow build (Pillow-SIMD versions end in .postN)"""
+        build = "Pillow-SIMD" if ".post" in PIL.__version__ else "Pillow"
+        codec = "libjpeg-turbo" if features.check_feature("libjpeg_turbo") else "libjpeg"
+        return f"Using {build} {PIL.__version__} with {codec}"
     
     def process_all_images(self):
         """Process all images to fix centering"""
@@ -73,30 +114,29 @@ class CenteringFixProcessor:
             print(f"Input directory {self.input_dir} not found!")
             return
         
-        # Get all image files
-        image_files = []
-        for filename in os.listdir(self.input_dir):
-            if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                image_files.append(filename)
+        # Get all image files in a single directory scan
+        with os.scandir(self.input_dir) as entries:
+            image_entries = [entry for entry in entries if entry.name.lower().endswith(('.jpg', '.jpeg', '.png'))]
+        image_files = [entry.name for entry in image_entries]
         
         print(f"Found {len(image_files)} images to fix")
+        print(self.describe_pillow_backend())
         
         processed_count = 0
         shortcuts_data = []
         
-        for i, filename in enumerate(image_files):
-            input_path = os.path.join(self.input_dir, filename)
-            
-            print(f"Processing {i+1}/{len(image_files)}: {filename}")
-            
-            # Fix image centering
-            output_path = self.fix_image_centering(input_path, filename)
+        # Fix image centering in parallel (the processor only holds paths and
+        # sizes, so sending it to the workers is cheap)
+        input_paths = [entry.path for entry in image_entries]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(self.fix_image_centering, input_paths, image_files, chunksize=8))
+        
+        for i, (filename, (output_path, file_size)) in enumerate(zip(image_files, results)):
+            print(f"Processed {i+1}/{len(image_files)}: {filename}")
             
             if output_path:
                 processed_count += 1
                 
-                # Get file size
-                file_size = os.path.getsize(output_path)
                 file_size_mb = file_size / (1024 * 1024)
                 
                 # Add to shortcuts data
@@ -113,8 +153,7 @@ class CenteringFixProcessor:
         
         # Save shortcuts JSON
         shortcuts_file = "shortcuts_fixed_centering_covers.json"
-        with open(shortcuts_file, 'w') as f:
-            json.dump(shortcuts_data, f, indent=2)
+        self.save_json(shortcuts_file, shortcuts_data)
         
         print(f"\nCompleted! Fixed centering for {processed_count} images.")
         print(f"Output directory: {self.output_dir}")
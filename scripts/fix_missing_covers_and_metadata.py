@@ -9,14 +9,45 @@ Fix Missing Covers and Metadata Script
 import os
 import json
 import shutil
+import hashlib
 from PIL import Image
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+try:
+    from blake3 import blake3
+except ImportError:  # Fall back to hashlib's BLAKE2
+    blake3 = None
+
+# Basic metadata template for covers added to complete the collection
+_MISSING_COVER_METADATA = {
+    "issueno": "",  # Would need to be looked up
+    "month": "",
+    "year": "",
+    "skater": "",  # Would need to be researched
+    "trick": "",   # Would need to be researched
+    "obstacle": "",
+    "detailer": "",
+    "staircount": "",
+    "spot": "",
+    "location": "",
+    "notes": "Cover added to complete collection",
+    "special": "",
+    "soty": "",
+    "filename": ""
+}
 
 class MissingCoversAndMetadataFixer:
     def __init__(self):
         self.original_dir = "images/original"
         self.optimized_dir = "images/optimized_final_with_text"
         self.shortcuts_json = "shortcuts_text_overlay_covers.json"
+        self.digests_file = os.path.join(self.optimized_dir, '.cover_digests.json')
         self.lock_screen_size = (1080, 1920)
         self.quality = 85
         
@@ -51,9 +82,6 @@ class MissingCoversAndMetadataFixer:
     def process_missing_cover(self, original_filename, target_filename):
         """Process a missing cover from original to optimized format"""
         original_path = os.path.join(self.original_dir, original_filename)
-        if not os.path.exists(original_path):
-            print(f"❌ Original file not found: {original_filename}")
-            return None
         
         # Use the provided target filename
         output_path = os.path.join(self.optimized_dir, target_filename)
@@ -94,15 +122,71 @@ class MissingCoversAndMetadataFixer:
             print(f"❌ Error processing {original_filename}: {e}")
             return None
     
+    def file_digest(self, path):
+        """Hash a file's contents in chunks without loading it all into memory"""
+        digest = blake3() if blake3 else hashlib.blake2b()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def load_digests(self):
+        """Load the source digests of previously added covers (digest -> target filename)"""
+        if not os.path.exists(self.digests_file):
+            return {}
+        
+        try:
+            with open(self.digests_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable {self.digests_file}: {e}")
+            return {}
+    
     def add_missing_covers(self):
         """Add all missing covers to the optimized directory"""
         print("🔄 Adding missing covers...")
         
-        added_covers = []
+        # Check which originals exist with a single directory scan
+        try:
+            with os.scandir(self.original_dir) as entries:
+                original_files = {entry.name for entry in entries}
+        except FileNotFoundError:
+            original_files = set()
+        
+        # Skip originals whose bytes were already added under another filename
+        digests = self.load_digests()
+        claimed = dict(digests)
+        target_digests = {}
+        covers = []
         for original_filename, target_filename in self.missing_covers:
-            result = self.process_missing_cover(original_filename, target_filename)
-            if result:
-                added_covers.append(result)
+            if original_filename not in original_files:
+                print(f"❌ Original file not found: {original_filename}")
+                continue
+            
+            digest = self.file_digest(os.path.join(self.original_dir, original_filename))
+            existing = claimed.setdefault(digest, target_filename)
+            if existing != target_filename:
+                print(f"⏭️  Skipping {original_filename}: same image as {existing}")
+                continue
+            
+            target_digests[target_filename] = digest
+            covers.append((original_filename, target_filename))
+        
+        if not covers:
+            print("✅ Added 0 missing covers")
+            return []
+        
+        # Resize and encode the covers in parallel
+        original_filenames, target_filenames = zip(*covers)
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(self.process_missing_cover, original_filenames, target_filenames)
+            added_covers = [result for result in results if result]
+        
+        # Only remember the digests of covers that were actually produced
+        for target_filename in added_covers:
+            digests[target_digests[target_filename]] = target_filename
+        if added_covers:
+            self.save_json(self.digests_file, digests)
         
         print(f"✅ Added {len(added_covers)} missing covers")
         return added_covers
@@ -112,31 +196,24 @@ class MissingCoversAndMetadataFixer:
         # Extract year and month from filename
         parts = filename.replace('.jpg', '').split('_')
         if len(parts) == 2:
-            year = parts[0]
-            month = parts[1]
-            
-            # Create basic metadata structure
-            metadata = {
-                "issueno": "",  # Would need to be looked up
-                "month": month,
-                "year": year,
-                "skater": "",  # Would need to be researched
-                "trick": "",   # Would need to be researched
-                "obstacle": "",
-                "detailer": "",
-                "staircount": "",
-                "spot": "",
-                "location": "",
-                "notes": "Cover added to complete collection",
-                "special": "",
-                "soty": "",
-                "filename": filename
-            }
+            # Copy the basic metadata structure and fill in what we know
+            metadata = _MISSING_COVER_METADATA.copy()
+            metadata["year"], metadata["month"] = parts
+            metadata["filename"] = filename
             
             return metadata
         
         return None
     
+    def save_json(self, path, data):
+        """Write data as indented JSON, using orjson when available"""
+        if orjson:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+    
     def update_shortcuts_json(self, added_covers):
         """Update the shortcuts JSON with new covers and improved metadata"""
         print("🔄 Updating shortcuts JSON...")
@@ -161,8 +238,7 @@ class MissingCoversAndMetadataFixer:
         data["total_images"] = len(data["images"])
         
         # Save updated JSON
-        with open(self.shortcuts_json, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.save_json(self.shortcuts_json, data)
         
         print(f"✅ Updated shortcuts JSON with {len(added_covers)} new covers")
         print(f"📊 Total covers: {data['total_images']}")
@@ -6,8 +6,42 @@ Handles special issues like Summer and PhotoIssue by matching with 4ply CSV data
 
 import csv
 import os
+import hashlib
 from PIL import Image, ImageDraw, ImageFont
 import json
+from concurrent.futures import ProcessPoolExecutor
+
+# Month name (lowercase) to number
+_MONTH_TO_NUM = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4,
+    'may': 5, 'june': 6, 'july': 7, 'august': 8,
+    'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'winter': 12  # Winter issue typically December
+}
+
+_MONTH_NAMES = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+# Month number used for special issues
+_SPECIAL_MONTHS = {
+    'Summer': 6,  # June
+    'PhotoIssue': 9,  # September
+    'Photo': 9,  # September
+}
+
+# Per-process fixer used by worker processes (config, CSV and fonts are loaded once per worker)
+_worker_fixer = None
+
+def _init_worker():
+    """Create the fixer used by this worker process"""
+    global _worker_fixer
+    _worker_fixer = SpecialIssueFixer()
+
+def _process_in_worker(image_path, metadata):
+    """Create one special issue's text overlay in a worker process"""
+    return _worker_fixer.create_text_overlay(image_path, metadata)
 
 class SpecialIssueFixer:
     def __init__(self):
@@ -15,14 +49,20 @@ class SpecialIssueFixer:
         self.output_dir = "images/optimized_final_with_text"
         self.csv_file = "data/4ply_covers.csv"
         self.config_file = "text_overlay_config.json"
+        self.manifest_file = os.path.join(self.output_dir, '.manifest.json')
         
         # Load configuration
         with open(self.config_file, 'r') as f:
             self.config = json.load(f)
+        self.config_digest = hashlib.blake2b(json.dumps(self.config, sort_keys=True).encode()).digest()
         
         # Load 4ply data
         self.fourply_data = self.load_4ply_data()
         
+        # Load fonts once for all images
+        self.fonts = self.load_fonts()
+        self.text_bbox_cache = {}
+        
         # Special issue mappings
         self.special_issue_mappings = {
             "Summer": "summer",
@@ -34,32 +74,50 @@ class SpecialIssueFixer:
         fourply_data = {}
         
         with open(self.csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
+            reader = csv.reader(f)
+            header = next(reader)
+            year_idx, month_idx = header.index('year'), header.index('month')
+            for values in reader:
+                year = values[year_idx]
+                month_name = values[month_idx].lower()
+                month = _MONTH_TO_NUM.get(month_name)
+                is_special = month_name in ('summer', 'winter')
+                
+                # Only build a row dict for rows that end up in the lookup
+                if not (month or is_special):
+                    continue
+                row = dict(zip(header, values))
+                
                 # Create key in YYYY_MM format
-                year = row['year']
-                month = self.month_to_number(row['month'])
                 if month:
                     key = f"{year}_{month:02d}"
                     fourply_data[key] = row
                 
                 # Also store by special issue type
-                if row['month'].lower() in ['summer', 'winter']:
-                    special_key = f"{year}_{row['month'].lower()}"
+                if is_special:
+                    special_key = f"{year}_{month_name}"
                     fourply_data[special_key] = row
         
         print(f"Loaded {len(fourply_data)} entries from 4ply CSV")
         return fourply_data
     
+    def load_fonts(self):
+        """Load the large, medium and small fonts based on configuration"""
+        font_config = self.config["font_settings"]
+        try:
+            return {
+                'large': ImageFont.truetype(f"{font_config['font_family']}-Bold.ttf", font_config["large_size"]),
+                'medium': ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["medium_size"]),
+                'small': ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["small_size"])
+            }
+        except:
+            # Fallback fonts
+            font = ImageFont.load_default()
+            return {'large': font, 'medium': font, 'small': font}
+    
     def month_to_number(self, month_name):
         """Convert month name to number"""
-        months = {
-            'january': 1, 'february': 2, 'march': 3, 'april': 4,
-            'may': 5, 'june': 6, 'july': 7, 'august': 8,
-            'september': 9, 'october': 10, 'november': 11, 'december': 12,
-            'winter': 12  # Winter issue typically December
-        }
-        return months.get(month_name.lower())
+        return _MONTH_TO_NUM.get(month_name.lower())
     
     def find_special_issue_metadata(self, filename):
         """Find metadata for special issues"""
@@ -100,42 +158,18 @@ class SpecialIssueFixer:
     
     def get_special_month_number(self, special_type):
         """Get month number for special issues"""
-        special_months = {
-            'Summer': 6,  # June
-            'PhotoIssue': 9,  # September
-            'Photo': 9,  # September
-        }
-        return special_months.get(special_type, 6)
+        return _SPECIAL_MONTHS.get(special_type, 6)
     
     def get_month_name(self, month_num):
         """Convert month number to name"""
-        months = [
-            'January', 'February', 'March', 'April', 'May', 'June',
-            'July', 'August', 'September', 'October', 'November', 'December'
-        ]
-        return months[month_num - 1] if 1 <= month_num <= 12 else ''
+        return _MONTH_NAMES[month_num - 1] if 1 <= month_num <= 12 else ''
     
     def create_text_overlay(self, image_path, metadata):
         """Create text overlay on image using configuration"""
         try:
-            # Open image
+            # Open image and draw on it directly (it is saved right after)
             image = Image.open(image_path)
-            
-            # Create a copy for drawing
-            overlay_image = image.copy()
-            draw = ImageDraw.Draw(overlay_image)
-            
-            # Load fonts based on configuration
-            font_config = self.config["font_settings"]
-            try:
-                font_large = ImageFont.truetype(f"{font_config['font_family']}-Bold.ttf", font_config["large_size"])
-                font_medium = ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["medium_size"])
-                font_small = ImageFont.truetype(f"{font_config['font_family']}-Regular.ttf", font_config["small_size"])
-            except:
-                # Fallback fonts
-                font_large = ImageFont.load_default()
-                font_medium = ImageFont.load_default()
-                font_small = ImageFont.load_default()
+            draw = ImageDraw.Draw(image)
             
             # Get colors from config
             text_color = tuple(self.config["colors"]["text_color"])
@@ -176,16 +210,16 @@ class SpecialIssueFixer:
             # Draw text lines
             for i, (line_type, line) in enumerate(lines):
                 # Choose font based on line type
-                if line_type in ["date", "skater"]:
-                    font = font_large
-                else:
-                    font = font_medium
+                font_key = 'large' if line_type in ["date", "skater"] else 'medium'
+                font = self.fonts[font_key]
                 
                 # Calculate text position
                 text_y = text_y_start + (i * line_spacing)
                 
-                # Get text bounds for centering
-                bbox = draw.textbbox((0, 0), line, font=font)
+                # Get text bounds for centering (cached per font and string)
+                bbox = self.text_bbox_cache.get((font_key, line))
+                if bbox is None:
+                    bbox = self.text_bbox_cache[font_key, line] = draw.textbbox((0, 0), line, font=font)
                 text_width = bbox[2] - bbox[0]
                 text_height = bbox[3] - bbox[1]
                 
@@ -193,18 +227,14 @@ class SpecialIssueFixer:
                 x = text_x - (text_width // 2)
                 y = text_y - (text_height // 2)
                 
-                # Draw outline
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        draw.text((x + dx, y + dy), line, font=font, fill=outline_color)
-                
-                # Draw main text
-                draw.text((x, y), line, font=font, fill=text_color)
+                # Draw main text with its outline in one native stroke pass
+                draw.text((x, y), line, font=font, fill=text_color,
+                          stroke_width=outline_width, stroke_fill=outline_color)
             
             # Save the image
             filename = os.path.basename(image_path)
             output_path = os.path.join(self.output_dir, filename)
-            overlay_image.save(output_path, quality=95)
+            image.save(output_path, quality=95, subsampling=2, progressive=False)
             
             return output_path
             
@@ -212,6 +242,30 @@ class SpecialIssueFixer:
             print(f"Error processing {image_path}: {e}")
             return None
     
+    def render_key(self, image_path, metadata):
+        """Hash the source image together with its metadata and the overlay config"""
+        image_digest = hashlib.blake2b()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                image_digest.update(chunk)
+        
+        key = hashlib.blake2b(image_digest.digest(), digest_size=16)
+        key.update(json.dumps(metadata, sort_keys=True).encode())
+        key.update(self.config_digest)
+        return key.hexdigest()
+    
+    def load_manifest(self):
+        """Load the render keys of the previous run (filename -> key)"""
+        if not os.path.exists(self.manifest_file):
+            return {}
+        
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable {self.manifest_file}: {e}")
+            return {}
+    
     def fix_special_issues(self):
         """Fix special issue images"""
         print("Fixing special issue images...")
@@ -230,29 +284,58 @@ class SpecialIssueFixer:
         
         fixed_count = 0
         
+        found_files = []
         for filename in special_issue_files:
-            image_path = os.path.join(self.input_dir, filename)
-            
-            if os.path.exists(image_path):
-                print(f"Processing special issue: {filename}")
-                
-                # Find metadata for special issue
-                metadata = self.find_special_issue_metadata(filename)
-                
-                if metadata:
-                    # Create text overlay
-                    output_path = self.create_text_overlay(image_path, metadata)
-                    if output_path:
-                        fixed_count += 1
-                        print(f"✅ Fixed: {filename}")
-                        print(f"   Metadata: {metadata.get('skater', 'N/A')} - {metadata.get('trick', 'N/A')}")
-                    else:
-                        print(f"❌ Failed to process: {filename}")
-                else:
-                    print(f"❌ No metadata found for: {filename}")
+            if os.path.exists(os.path.join(self.input_dir, filename)):
+                found_files.append(filename)
             else:
                 print(f"❌ File not found: {filename}")
         
+        # Skip files whose source, metadata and config match the last render
+        manifest = self.load_manifest()
+        metadata_by_file = {}
+        render_keys = {}
+        pending_files = []
+        for filename in found_files:
+            metadata = metadata_by_file[filename] = self.find_special_issue_metadata(filename)
+            if not metadata:
+                continue
+            
+            render_keys[filename] = self.render_key(os.path.join(self.input_dir, filename), metadata)
+            if (manifest.get(filename) != render_keys[filename]
+                    or not os.path.exists(os.path.join(self.output_dir, filename))):
+                pending_files.append(filename)
+        
+        # Process the changed special issues in parallel
+        results = {}
+        if pending_files:
+            image_paths = [os.path.join(self.input_dir, filename) for filename in pending_files]
+            metadatas = [metadata_by_file[filename] for filename in pending_files]
+            with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker) as executor:
+                results = dict(zip(pending_files, executor.map(_process_in_worker, image_paths, metadatas)))
+        
+        for filename in found_files:
+            print(f"Processing special issue: {filename}")
+            metadata = metadata_by_file[filename]
+            
+            if not metadata:
+                print(f"❌ No metadata found for: {filename}")
+            elif filename not in results:
+                fixed_count += 1
+                print(f"✅ Up to date: {filename}")
+            elif results[filename]:
+                fixed_count += 1
+                manifest[filename] = render_keys[filename]
+                print(f"✅ Fixed: {filename}")
+                print(f"   Metadata: {metadata.get('skater', 'N/A')} - {metadata.get('trick', 'N/A')}")
+            else:
+                manifest.pop(filename, None)
+                print(f"❌ Failed to process: {filename}")
+        
+        # Remember what was rendered so unchanged files are skipped next time
+        with open(self.manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
         print(f"\n✅ Fixed {fixed_count} special issue images!")
         return fixed_count
 
@@ -7,17 +7,35 @@ Pulls images from GitHub repository and adds text overlays with 4ply metadata
 import os
 import json
 import requests
-from PIL import Image, ImageDraw, ImageFont
+import aiohttp
+import asyncio
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 from io import BytesIO
-import base64
+from concurrent.futures import ThreadPoolExecutor
 
 class GitHubImageProcessor:
     def __init__(self):
         self.github_api_base = "https://api.github.com/repos/kyleplathe/thrasher-lockscreen/contents"
+        self.github_raw_base = "https://raw.githubusercontent.com/kyleplathe/thrasher-lockscreen/main"
+        self.github_trees_api = "https://api.github.com/repos/kyleplathe/thrasher-lockscreen/git/trees"
+        self.repo_tree = None
         self.output_dir = "images/github_text_overlay"
         self.lock_screen_size = (1080, 1920)
         self.quality = 85
         
+        # Retry policy shared by the API session and the async downloads
+        self.max_retries = 3
+        self.retry_backoff = 0.3
+        self.retry_statuses = [429, 500, 502, 503, 504]
+        
+        # Reuse one keep-alive connection pool for every GitHub API request
+        self.session = requests.Session()
+        retries = Retry(total=self.max_retries, backoff_factor=self.retry_backoff, status_forcelist=self.retry_statuses)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retries)
+        self.session.mount('https://', adapter)
+        
         # Create output directory
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -27,18 +45,38 @@ class GitHubImageProcessor:
         self.text_color = (255, 255, 255)  # White
         self.text_bg_color = (0, 0, 0)  # Black background
         
+        # Load the overlay font once for all images
+        self.font = self.load_font(48)
+        self.text_bbox_cache = {}
+        
+    def load_font(self, size):
+        """Load the first available system font, falling back to the default"""
+        try:
+            font_paths = [
+                "/System/Library/Fonts/Helvetica.ttc",  # macOS
+                "/usr/share/fonts/truetype/roboto/Roboto-Regular.ttf",  # Linux
+                "C:/Windows/Fonts/arial.ttf",  # Windows
+            ]
+            
+            for path in font_paths:
+                if os.path.exists(path):
+                    return ImageFont.truetype(path, size)
+        
+        except Exception:
+            pass
+        
+        return ImageFont.load_default()
+    
     def get_github_file_content(self, file_path):
-        """Get file content from GitHub"""
+        """Get file content from GitHub as raw bytes"""
         try:
-            url = f"{self.github_api_base}/{file_path}"
-            response = requests.get(url)
+            # Serve files straight from raw.githubusercontent.com; the Contents
+            # API is only needed for directory listings
+            response = self.session.get(f"{self.github_raw_base}/{file_path}", timeout=30)
             response.raise_for_status()
             
-            content_data = response.json()
-            if 'content' in content_data:
-                # Decode base64 content
-                content = base64.b64decode(content_data['content'])
-                return content
+            if response.content:
+                return response.content
             else:
                 print(f"No content found for {file_path}")
                 return None
@@ -47,11 +85,45 @@ class GitHubImageProcessor:
             print(f"Error fetching {file_path}: {e}")
             return None
     
+    def get_repo_tree(self, ref='main'):
+        """Get every path in the repository with one Git Trees API call
+        
+        The flat list of entries is cached, so later listings need no requests.
+        Returns None if the tree can't be fetched or was truncated by GitHub.
+        """
+        if self.repo_tree is None:
+            try:
+                response = self.session.get(f"{self.github_trees_api}/{ref}", params={'recursive': 1})
+                response.raise_for_status()
+                
+                tree_data = response.json()
+                if tree_data.get('truncated'):
+                    print("Repository tree is truncated; falling back to per-directory listings")
+                    return None
+                self.repo_tree = tree_data['tree']
+                
+            except Exception as e:
+                print(f"Error fetching repository tree: {e}")
+                return None
+        
+        return self.repo_tree
+    
     def get_github_directory_listing(self, directory_path):
         """Get directory listing from GitHub"""
+        # Filter the cached repository tree when available
+        tree = self.get_repo_tree()
+        if tree is not None:
+            directory_path = directory_path.strip('/')
+            files = []
+            for entry in tree:
+                parent, _, name = entry['path'].rpartition('/')
+                if entry['type'] == 'blob' and parent == directory_path:
+                    files.append(name)
+            return files
+        
         try:
             url = f"{self.github_api_base}/{directory_path}"
-            response = requests.get(url)
+            response = self.session.get(url)
             response.raise_for_status()
             
             files = response.json()
@@ -62,33 +134,19 @@ class GitHubImageProcessor:
             return []
     
     def add_text_overlay(self, image, text):
-        """Add text overlay to image"""
+        """Add text overlay to image
+        
+        Draws onto the given image in place and returns it.
+        """
         try:
-            img_with_text = image.copy()
-            draw = ImageDraw.Draw(img_with_text)
+            draw = ImageDraw.Draw(image)
             
-            # Try to load font
-            try:
-                font_paths = [
-                    "/System/Library/Fonts/Helvetica.ttc",  # macOS
-                    "/usr/share/fonts/truetype/roboto/Roboto-Regular.ttf",  # Linux
-                    "C:/Windows/Fonts/arial.ttf",  # Windows
-                ]
-                
-                font = None
-                for path in font_paths:
-                    if os.path.exists(path):
-                        font = ImageFont.truetype(path, 48)
-                        break
-                
-                if font is None:
-                    font = ImageFont.load_default()
-                    
-            except Exception:
-                font = ImageFont.load_default()
+            font = self.font
             
-            # Get text dimensions
-            bbox = draw.textbbox((0, 0), text, font=font)
+            # Get text dimensions (cached per distinct string)
+            bbox = self.text_bbox_cache.get(text)
+            if bbox is None:
+                bbox = self.text_bbox_cache[text] = draw.textbbox((0, 0), text, font=font)
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
             
@@ -105,7 +163,7 @@ class GitHubImageProcessor:
             # Draw text
             draw.text((self.text_x, self.text_y), text, font=font, fill=self.text_color, anchor="mm")
             
-            return img_with_text
+            return image
             
         except Exception as e:
             print(f"Error adding text overlay: {e}")
@@ -121,29 +179,14 @@ class GitHubImageProcessor:
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Create black background with lock screen dimensions
-            background = Image.new('RGB', self.lock_screen_size, (0, 0, 0))
-            
-            # Calculate scaling to fit image within lock screen
-            img_ratio = image.width / image.height
-            target_ratio = self.lock_screen_size[0] / self.lock_screen_size[1]
-            
-            if img_ratio > target_ratio:
-                new_width = self.lock_screen_size[0]
-                new_height = int(new_width / img_ratio)
-            else:
-                new_height = self.lock_screen_size[1]
-                new_width = int(new_height * img_ratio)
-            
-            # Resize image
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Calculate position to center image
-            x = (self.lock_screen_size[0] - new_width) // 2
-            y = (self.lock_screen_size[1] - new_height) // 2
+            # BOX is much cheaper than LANCZOS and looks the same when
+            # shrinking by more than 2x
+            scale = max(image.width / self.lock_screen_size[0], image.height / self.lock_screen_size[1])
+            resample = Image.Resampling.BOX if scale > 2.0 else Image.Resampling.LANCZOS
             
-            # Paste image onto background
-            background.paste(image, (x, y))
+            # Resize to fit the lock screen and center it on a black background
+            # (covers that already fill the screen skip the background entirely)
+            background = ImageOps.pad(image, self.lock_screen_size, method=resample, color=(0, 0, 0))
             
             # Create text overlay
             text = f"{cover_info['year']} - {cover_info['month']}"
@@ -155,7 +198,7 @@ class GitHubImageProcessor:
             
             # Save image
             output_path = os.path.join(self.output_dir, filename)
-            final_image.save(output_path, 'JPEG', quality=self.quality, optimize=True)
+            final_image.save(output_path, 'JPEG', quality=self.quality, subsampling=2, progressive=False)
             
             return output_path
             
@@ -163,6 +206,41 @@ class GitHubImageProcessor:
             print(f"Error processing image {filename}: {e}")
             return None
     
+    async def _fetch_async(self, session, file_path):
+        """Get one file's raw bytes from GitHub without blocking the others
+        
+        Throttled (429), 5xx and failed requests are retried with exponential
+        backoff, the same policy as the API session.
+        """
+        url = f"{self.github_raw_base}/{file_path}"
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            
+            try:
+                async with session.get(url) as response:
+                    if response.status in self.retry_statuses and attempt < self.max_retries:
+                        continue
+                    if response.status >= 400:
+                        print(f"Error fetching {file_path}: HTTP {response.status}")
+                        return None
+                    
+                    image_data = await response.read()
+                    if not image_data:
+                        print(f"No content found for {file_path}")
+                    return image_data or None
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    print(f"Error fetching {file_path}: {e}")
+                    return None
+    
+    async def _fetch_all_async(self, file_paths):
+        """Download all files concurrently over one session"""
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await asyncio.gather(*[self._fetch_async(session, path) for path in file_paths])
+    
     def create_test_images_from_github(self):
         """Create test images by pulling from GitHub"""
         print("Creating test images from GitHub with text overlays...")
@@ -208,19 +286,24 @@ class GitHubImageProcessor:
         
         processed_count = 0
         
-        for cover_info in test_covers:
+        # Fetch every cover concurrently first
+        image_datas = asyncio.run(self._fetch_all_async([cover["github_path"] for cover in test_covers]))
+        
+        # Then process the downloaded covers on threads (Pillow releases the
+        # GIL while resizing and encoding)
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [
+                executor.submit(self.process_image_with_text, image_data, cover["filename"], cover) if image_data else None
+                for cover, image_data in zip(test_covers, image_datas)
+            ]
+        
+        for cover_info, future in zip(test_covers, futures):
             filename = cover_info["filename"]
-            github_path = cover_info["github_path"]
             
             print(f"Processing {filename} from GitHub...")
             
-            # Get image from GitHub
-            image_data = self.get_github_file_content(github_path)
-            
-            if image_data:
-                # Process image with text overlay
-                output_path = self.process_image_with_text(image_data, filename, cover_info)
-                
+            if future:
+                output_path = future.result()
                 if output_path:
                     processed_count += 1
                     print(f"✓ Created: {output_path}")
@@ -6,7 +6,6 @@ Optimizes downloaded images for iPhone lock screen display
 
 from PIL import Image
 import os
-import glob
 from pathlib import Path
 
 class LocalImageOptimizer:
@@ -68,8 +67,14 @@ class LocalImageOptimizer:
     
     def process_all_images(self):
         """Process all images in the input directory"""
-        # Get all JPEG files
-        image_files = list(self.input_dir.glob("*.jpg")) + list(self.input_dir.glob("*.jpeg"))
+        # Get all JPEG files in a single directory scan
+        image_files = []
+        if self.input_dir.is_dir():
+            with os.scandir(self.input_dir) as entries:
+                image_files = [
+                    self.input_dir / entry.name for entry in entries
+                    if entry.is_file() and entry.name.endswith(('.jpg', '.jpeg'))
+                ]
         
         print(f"📥 Found {len(image_files)} images to optimize")
         print(f"📁 Input: {self.input_dir}")
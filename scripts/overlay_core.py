@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Overlay Core
+Shared text overlay processor used by the collection scripts
+"""
+
+import os
+import json
+import time
+import tarfile
+from io import BytesIO
+from itertools import repeat
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+# Per-process processor used by worker processes (fonts are loaded once per worker)
+_worker_processor = None
+
+def _init_worker(processor_class):
+    """Create the processor used by this worker process"""
+    global _worker_processor
+    _worker_processor = processor_class()
+
+def _process_in_worker(input_path, filename, pack=False):
+    """Process one image in a worker process"""
+    return _worker_processor.process_image_with_text(input_path, filename, pack)
+
+class BaseOverlayProcessor:
+    """Adds a "YYYY - Month" label to every image in a directory
+    
+    Subclasses only set the layout constants in __init__ and must be
+    constructible without arguments so worker processes can rebuild them.
+    """
+    def __init__(self, input_dir, output_dir, shortcuts_file, lock_screen_size,
+                 text_x, text_y, font_size, padding, pad_to_lockscreen=False, quality=85):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.shortcuts_file = shortcuts_file
+        self.entries_file = os.path.join(output_dir, '.shortcuts_entries.json')
+        self.lock_screen_size = lock_screen_size
+        self.quality = quality
+        
+        # Letterbox inputs onto a black lock-screen-sized background first
+        self.pad_to_lockscreen = pad_to_lockscreen
+        self._background = None
+        
+        # Rendered text tiles, keyed by text
+        self._tile_cache = {}
+        
+        # Create output directory
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Text positioning
+        self.text_x = text_x
+        self.text_y = text_y
+        self.padding = padding
+        self.text_color = (255, 255, 255)  # White
+        self.text_bg_color = (0, 0, 0)  # Black background
+        
+        # Month names for display
+        self.month_names = {
+            "01": "January", "02": "February", "03": "March", "04": "April",
+            "05": "May", "06": "June", "07": "July", "08": "August",
+            "09": "September", "10": "October", "11": "November", "12": "December"
+        }
+        
+        # Load the overlay font once for the whole collection
+        self.font = self.load_font(font_size)
+    
+    def load_font(self, size):
+        """Load the first available system font, falling back to the default"""
+        try:
+            font_paths = [
+                "/System/Library/Fonts/Helvetica.ttc",  # macOS
+                "/usr/share/fonts/truetype/roboto/Roboto-Regular.ttf",  # Linux
+                "C:/Windows/Fonts/arial.ttf",  # Windows
+            ]
+            
+            for path in font_paths:
+                if os.path.exists(path):
+                    return ImageFont.truetype(path, size)
+        
+        except Exception:
+            pass
+        
+        return ImageFont.load_default()
+    
+    def render_text_tile(self, text):
+        """Render the text and its background once per distinct string
+        
+        Returns the tile and the top-left position to paste it at.
+        """
+        cached = self._tile_cache.get(text)
+        if cached is not None:
+            return cached
+        
+        # Get text dimensions
+        bbox = self.font.getbbox(text)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        
+        # Calculate background rectangle
+        bg_x1 = self.text_x - text_width // 2 - self.padding
+        bg_y1 = self.text_y - text_height // 2 - self.padding
+        bg_x2 = self.text_x + text_width // 2 + self.padding
+        bg_y2 = self.text_y + text_height // 2 + self.padding
+        
+        # The background is opaque, so the tile needs no alpha channel
+        tile = Image.new('RGB', (bg_x2 - bg_x1 + 1, bg_y2 - bg_y1 + 1), self.text_bg_color)
+        draw = ImageDraw.Draw(tile)
+        draw.text((self.text_x - bg_x1, self.text_y - bg_y1), text, font=self.font, fill=self.text_color, anchor="mm")
+        
+        cached = self._tile_cache[text] = (tile, (bg_x1, bg_y1))
+        return cached
+    
+    def add_text_overlay(self, image, text):
+        """Add text overlay to image"""
+        try:
+            # Paste the cached text tile directly onto the image
+            tile, position = self.render_text_tile(text)
+            image.paste(tile, position)
+            
+            return image
+        
+        except Exception as e:
+            print(f"Error adding text overlay: {e}")
+            return image
+    
+    def extract_date_from_filename(self, filename):
+        """Extract date information from filename (YYYY_MM format)"""
+        parts = os.path.splitext(filename)[0].split('_', 2)
+        if len(parts) < 2:
+            return None
+        
+        year, month_num = parts[0], parts[1]
+        return {
+            "year": year,
+            "month": self.month_names.get(month_num, month_num),
+            "month_num": month_num
+        }
+    
+    def fit_to_lockscreen(self, image):
+        """Resize image to fit the lock screen and center it on black
+        
+        Returns the processor's reusable background, which is overwritten by
+        the next call.
+        """
+        # Resize image to fit within lock screen, keeping aspect ratio
+        image = ImageOps.contain(image, self.lock_screen_size, Image.Resampling.LANCZOS)
+        
+        # Reuse one black background instead of allocating one per image;
+        # only clear it when the image won't cover the previous one
+        background = self._background
+        if background is None:
+            background = self._background = Image.new('RGB', self.lock_screen_size, (0, 0, 0))
+        elif image.size != self.lock_screen_size:
+            background.paste((0, 0, 0), (0, 0) + self.lock_screen_size)
+        
+        # Calculate position to center image
+        x = (self.lock_screen_size[0] - image.width) // 2
+        y = (self.lock_screen_size[1] - image.height) // 2
+        
+        # Paste image onto background
+        background.paste(image, (x, y))
+        
+        return background
+    
+    def process_image_with_text(self, input_path, filename, pack=False):
+        """Process image and add text overlay
+        
+        With pack=True the encoded JPEG bytes are returned instead of being
+        written to the output directory.
+        """
+        try:
+            # Open image
+            image = Image.open(input_path)
+            
+            if self.pad_to_lockscreen:
+                # Let libjpeg decode oversized JPEGs at a reduced scale (no-op for
+                # other formats); LANCZOS still does the final resize
+                image.draft('RGB', self.lock_screen_size)
+            
+            # Convert to RGB if necessary
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            
+            if self.pad_to_lockscreen:
+                image = self.fit_to_lockscreen(image)
+            
+            # Extract date information
+            date_info = self.extract_date_from_filename(filename)
+            
+            if date_info:
+                # Create text overlay
+                text = f"{date_info['year']} - {date_info['month']}"
+                
+                # Add text overlay
+                final_image = self.add_text_overlay(image, text)
+                
+                if pack:
+                    # Encode in memory; the parent process writes the archive
+                    buffer = BytesIO()
+                    final_image.save(buffer, 'JPEG', quality=self.quality, optimize=False, progressive=False)
+                    return buffer.getvalue(), date_info
+                
+                # Save image
+                output_path = os.path.join(self.output_dir, filename)
+                final_image.save(output_path, 'JPEG', quality=self.quality, optimize=False, progressive=False)
+                
+                return output_path, date_info
+            else:
+                print(f"Could not extract date from {filename}")
+                return None, None
+        
+        except Exception as e:
+            print(f"Error processing image {filename}: {e}")
+            return None, None
+    
+    def write_pack(self, pack_path, image_files, results):
+        """Stream encoded images into a single tar archive
+        
+        Members are named after their per-file output path, so extracting the
+        archive from the repo root recreates the output directory.
+        """
+        packed_results = []
+        output_sizes = {}
+        
+        with tarfile.open(pack_path, 'w', bufsize=1 << 20) as tar:
+            for filename, (data, date_info) in zip(image_files, results):
+                if data is None:
+                    packed_results.append((None, None))
+                    continue
+                
+                output_path = os.path.join(self.output_dir, filename)
+                tarinfo = tarfile.TarInfo(output_path)
+                tarinfo.size = len(data)
+                tarinfo.mtime = int(time.time())
+                tar.addfile(tarinfo, BytesIO(data))
+                
+                output_sizes[filename] = len(data)
+                packed_results.append((output_path, date_info))
+        
+        return packed_results, output_sizes
+    
+    def write_json(self, path, data):
+        """Write data as indented JSON, using orjson when available"""
+        if orjson:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+    
+    def load_cached_entries(self):
+        """Load the shortcuts entries saved by the previous run, keyed by filename"""
+        if not os.path.exists(self.entries_file):
+            return {}
+        
+        try:
+            with open(self.entries_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable {self.entries_file}: {e}")
+            return {}
+    
+    def create_collection(self, pack=False):
+        """Add text overlays to every input image and write the shortcuts JSON
+        
+        With pack=True all images go into a single <output_dir>.tar archive
+        instead of one file each. Otherwise images whose output is newer than
+        the input are skipped and their previous shortcuts entry is reused.
+        """
+        if not os.path.exists(self.input_dir):
+            print(f"Input directory {self.input_dir} not found!")
+            return
+        
+        # Get all image files with their modification times
+        with os.scandir(self.input_dir) as entries:
+            input_mtimes = {
+                entry.name: entry.stat().st_mtime for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(('.jpg', '.jpeg', '.png'))
+            }
+        image_files = list(input_mtimes)
+        
+        print(f"Found {len(image_files)} images to process")
+        
+        # Reuse entries for outputs that are at least as new as their input
+        cached_entries = {}
+        if not pack:
+            previous_entries = self.load_cached_entries()
+            with os.scandir(self.output_dir) as entries:
+                output_mtimes = {entry.name: entry.stat().st_mtime for entry in entries}
+            cached_entries = {
+                filename: previous_entries[filename] for filename in image_files
+                if filename in previous_entries and output_mtimes.get(filename, 0) >= input_mtimes[filename]
+            }
+            if cached_entries:
+                print(f"Skipping {len(cached_entries)} up-to-date images")
+        
+        pending_files = [filename for filename in image_files if filename not in cached_entries]
+        
+        processed_count = 0
+        shortcuts_data = []
+        
+        # Process images with text overlay in parallel
+        input_paths = [os.path.join(self.input_dir, filename) for filename in pending_files]
+        pack_path = f"{self.output_dir}.tar"
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                                 initargs=(type(self),)) as executor:
+            results = executor.map(_process_in_worker, input_paths, pending_files, repeat(pack), chunksize=8)
+            
+            if pack:
+                results, output_sizes = self.write_pack(pack_path, pending_files, results)
+            else:
+                results = list(results)
+        results = dict(zip(pending_files, results))
+        
+        if not pack:
+            # Collect output file sizes in a single directory scan
+            with os.scandir(self.output_dir) as entries:
+                output_sizes = {entry.name: entry.stat().st_size for entry in entries}
+        
+        for i, filename in enumerate(image_files):
+            if filename in cached_entries:
+                print(f"Up to date {i+1}/{len(image_files)}: {filename}")
+                processed_count += 1
+                shortcuts_data.append(cached_entries[filename])
+                continue
+            
+            output_path, date_info = results[filename]
+            print(f"Processed {i+1}/{len(image_files)}: {filename}")
+            
+            if output_path:
+                processed_count += 1
+                
+                # Get file size
+                file_size = output_sizes[os.path.basename(output_path)]
+                file_size_mb = file_size / (1024 * 1024)
+                
+                # Add to shortcuts data
+                shortcuts_data.append({
+                    "filename": filename,
+                    "local_path": output_path,
+                    "file_size": file_size,
+                    "file_size_mb": round(file_size_mb, 2),
+                    "year": date_info.get("year", ""),
+                    "month": date_info.get("month", ""),
+                    "month_num": date_info.get("month_num", "")
+                })
+                
+                print(f"✓ Created: {output_path}")
+            else:
+                print(f"✗ Failed to process: {filename}")
+        
+        # Save shortcuts JSON
+        self.write_json(self.shortcuts_file, shortcuts_data)
+        
+        if not pack:
+            # Remember each entry so the next run can skip unchanged images
+            self.write_json(self.entries_file, {entry["filename"]: entry for entry in shortcuts_data})
+        
+        print(f"\nCompleted! Created {processed_count} images with text overlays.")
+        if pack:
+            print(f"Output archive: {pack_path}")
+        else:
+            print(f"Output directory: {self.output_dir}")
+        print(f"Shortcuts JSON: {self.shortcuts_file}")
+        
+        return processed_count
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Rate Limit
+Shared request throttle used by the async scrapers
+"""
+
+import asyncio
+
+class AsyncRateLimiter:
+    """Space out async requests so at most `rate` start per second"""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = asyncio.Lock()
+        self._next_time = 0.0
+    
+    async def wait(self):
+        """Sleep until the next request slot is available"""
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next_time - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_time = max(now, self._next_time) + self.interval
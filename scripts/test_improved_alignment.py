@@ -196,13 +196,9 @@ class TestImprovedTextOverlay:
                 # Position text vertically (center of current line)
                 y = current_y - (text_height // 2)
                 
-                # Draw outline for better visibility
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        draw.text((x + dx, y + dy), line, font=font, fill=outline_color)
-                
-                # Draw main text
-                draw.text((x, y), line, font=font, fill=text_color)
+                # Draw main text with outline for better visibility
+                draw.text((x, y), line, font=font, fill=text_color,
+                          stroke_width=outline_width, stroke_fill=outline_color)
                 
                 # Move to next line position
                 current_y += text_height + line_spacing
@@ -129,13 +129,9 @@ class TextOverlayTester:
                 outline_color = (0, 0, 0)
                 outline_width = 3
                 
-                # Draw outline
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        draw.text((x + dx, y + dy), line, font=font, fill=outline_color)
-                
-                # Draw main text
-                draw.text((x, y), line, font=font, fill=text_color)
+                # Draw main text with outline
+                draw.text((x, y), line, font=font, fill=text_color,
+                          stroke_width=outline_width, stroke_fill=outline_color)
             
             # Save the image
             filename = os.path.basename(image_path)